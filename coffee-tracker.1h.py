@@ -11,31 +11,68 @@
 # <swiftbar.hideRunInTerminal>true</swiftbar.hideRunInTerminal>
 # <swiftbar.hideSwiftBar>true</swiftbar.hideSwiftBar>
 
+import fcntl
+import hashlib
+import json
 import os
 import socket
+import sqlite3
+import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
 from datetime import date, datetime
 from enum import Enum
 from pathlib import Path
-from typing import Optional
-from urllib.parse import quote, urlencode
+from typing import TYPE_CHECKING, Any, Final, Iterator, Optional
+from urllib.parse import quote, urlencode, urlparse
 
-import keyring
-import requests
-import typer
 from pydantic import BaseModel
 
+# Heavy dependencies not needed to render the plugin are imported where they are
+# used so the default render starts as fast as possible.
+if TYPE_CHECKING:
+    import requests
+    import typer
+
 # --- API and app configuration ---
 
 self_path = Path(sys.argv[0])
 
-api_url = "https://coffee-counter.deta.dev/"
+if (data_path := os.getenv("SWIFTBAR_PLUGIN_DATA_PATH")) is not None:
+    plugin_data_dir = Path(data_path)
+else:
+    plugin_data_dir = Path.home() / ".cache" / "swiftbar-coffee-tracker"
+
+api_url = os.getenv("COFFEE_TRACKER_API_URL", "https://coffee-counter.deta.dev/")
 streamlit_url = "https://share.streamlit.io/jhrcook/coffee-counter-streamlit/app.py"
-app = typer.Typer()
 
 # --- Constants ---
 
 ICON_BROWN: str = "#764636"
+CONNECT_TIMEOUT: float = 3.05  # seconds
+READ_TIMEOUT: float = 5.0  # seconds
+MAX_RETRIES: int = 2
+REACHABILITY_TTL: float = 60.0  # seconds
+
+# Seconds after which a cached response is stale, keyed by endpoint.
+CACHE_TTLS: Final[dict[str, float]] = {
+    "active_bags/": 6 * 60 * 60,
+    "number_of_uses/": 5 * 60,
+}
+DEFAULT_CACHE_TTL: float = 60.0  # seconds
+CACHE_MAX_AGE: float = 2 * 24 * 60 * 60  # seconds; older entries are evicted
+FLUSH_BATCH_SIZE: int = 20
+FLUSH_LOCK_WAIT: float = 2.0  # seconds a click waits for another flush to finish
+FETCH_WORKERS: int = 2
+MENU_CACHE_VERSION: int = 2  # bump when the format of the menu block changes
+
+# Seconds the API password is kept by the credential cache helper (0 to disable).
+CREDENTIAL_CACHE_LIFETIME: float = float(
+    os.getenv("COFFEE_TRACKER_CREDENTIAL_LIFETIME", 5 * 60)
+)
 
 
 class CLICommands(str, Enum):
@@ -45,18 +82,198 @@ class CLICommands(str, Enum):
     use_bag = "use_bag"
     new_bag = "new_bag"
     profile = "profile"
+    importtime = "importtime"
+    cache = "cache"
+    queue = "queue"
+    credentials = "credentials"
 
 
 # --- Interactions with KeyChain ---
 
 
+class CredentialCache:
+    """Memory-only cache of the API password, held by a short-lived helper process.
+
+    The helper listens on a Unix socket that only the current user can access and
+    exits once its lifetime is over, so rapid successive clicks do not each need a
+    keychain lookup.
+
+    The click that looks up the password creates the listening socket itself while
+    holding a lock on a sibling lock file, then hands both to the helper. The next
+    click can connect right away (its request waits in the socket's backlog while
+    the helper starts), and the lock, held for the helper's lifetime, stops a second
+    helper from replacing the socket of a running one.
+    """
+
+    def __init__(
+        self, socket_file: Path, lifetime: float = CREDENTIAL_CACHE_LIFETIME
+    ) -> None:
+        """Create a credential cache.
+
+        Args:
+            socket_file (Path): Unix socket of the helper process.
+            lifetime (float, optional): Seconds the helper keeps the password. The
+            cache is disabled if not positive. Defaults to `CREDENTIAL_CACHE_LIFETIME`.
+        """
+        self.socket_file = socket_file
+        self.lock_file = socket_file.with_suffix(".lock")
+        self.lifetime = lifetime
+        return None
+
+    def _send(self, request: bytes) -> Optional[bytes]:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                # Long enough for a helper that is still starting to accept.
+                sock.settimeout(1.0)
+                sock.connect(str(self.socket_file))
+                sock.sendall(request)
+                sock.shutdown(socket.SHUT_WR)
+                chunks: list[bytes] = []
+                while chunk := sock.recv(4096):
+                    chunks.append(chunk)
+        except OSError:
+            return None
+        return b"".join(chunks)
+
+    def get(self) -> Optional[str]:
+        """The cached password, if the helper process is running."""
+        if self.lifetime <= 0:
+            return None
+        response = self._send(b"GET")
+        return response.decode() if response else None
+
+    def start(self, password: str) -> None:
+        """Start the helper process with the password.
+
+        Nothing is done if another helper holds the lock. The password is passed
+        over a pipe, not the command line.
+
+        Args:
+            password (str): Password for the API.
+        """
+        if self.lifetime <= 0:
+            return None
+        self.socket_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_file, "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return None  # Another helper is running or starting.
+            # Holding the lock, any socket file left here is from a dead helper.
+            self.socket_file.unlink(missing_ok=True)
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            old_umask = os.umask(0o177)
+            try:
+                server.bind(str(self.socket_file))
+            finally:
+                os.umask(old_umask)
+            server.listen()
+            cmd = [sys.executable, str(self_path), CLICommands.credentials.value]
+            cmd += [
+                "agent",
+                "--socket-file",
+                str(self.socket_file),
+                "--lifetime",
+                str(self.lifetime),
+                "--listen-fd",
+                str(server.fileno()),
+                "--lock-fd",
+                str(lock.fileno()),
+            ]
+            with server:
+                # The helper inherits the lock (the same open file), so the lock
+                # stays held after this process closes its copy.
+                proc = subprocess.Popen(
+                    cmd,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    start_new_session=True,
+                    pass_fds=(server.fileno(), lock.fileno()),
+                )
+        if proc.stdin is not None:
+            proc.stdin.write(password.encode())
+            proc.stdin.close()
+        return None
+
+    def stop(self) -> bool:
+        """Stop the helper process, forgetting the password.
+
+        Returns:
+            bool: Whether a helper process was running.
+        """
+        return self._send(b"STOP") is not None
+
+    def serve(self, password: str, listen_fd: int, lock_fd: int) -> None:
+        """Hold the password and serve it until the lifetime is over.
+
+        This is run in the helper process, on the socket and lock handed over by
+        `start()`.
+
+        Args:
+            password (str): Password for the API.
+            listen_fd (int): Listening socket bound to the socket file.
+            lock_fd (int): Lock file descriptor, locked by `start()`.
+        """
+        server = socket.socket(fileno=listen_fd)
+        try:
+            socket_inode: Optional[int] = self.socket_file.stat().st_ino
+        except OSError:
+            socket_inode = None
+        deadline = time.monotonic() + self.lifetime
+        try:
+            while (remaining := deadline - time.monotonic()) > 0:
+                server.settimeout(remaining)
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    break
+                with conn:
+                    conn.settimeout(1.0)
+                    try:
+                        request = conn.recv(16)
+                        if request == b"GET":
+                            conn.sendall(password.encode())
+                        elif request == b"STOP":
+                            conn.sendall(b"OK")
+                            break
+                        else:
+                            conn.sendall(b"OK")
+                    except OSError:
+                        continue
+        finally:
+            server.close()
+            # Only remove the socket file if it is still the one this helper served.
+            try:
+                if self.socket_file.stat().st_ino == socket_inode:
+                    self.socket_file.unlink()
+            except OSError:
+                pass
+            os.close(lock_fd)
+        return None
+
+
+credential_cache = CredentialCache(plugin_data_dir / "credential.sock")
+
+
 def get_api_password() -> Optional[str]:
     """Get my password for the API.
 
+    The password is served by the credential cache if its helper is running.
+    Otherwise, it is looked up in the keychain and the helper is started.
+
     Returns:
         Optional[str]: The password, if one is found.
     """
-    return keyring.get_password("swiftbar_coffee-tracker", "Joshua Cook")
+    if (password := credential_cache.get()) is not None:
+        return password
+
+    import keyring
+
+    password = keyring.get_password("swiftbar_coffee-tracker", "Joshua Cook")
+    if password is not None:
+        credential_cache.start(password)
+    return password
 
 
 # --- Models ---
@@ -84,6 +301,110 @@ class CoffeeUse(BaseModel):
     key: str
 
 
+class CachedResponse(BaseModel):
+    """API response stored in the local response cache."""
+
+    key: str
+    body: Any
+    fetched: float
+
+    @property
+    def age(self) -> float:
+        """Seconds since the response was fetched."""
+        return time.time() - self.fetched
+
+    @property
+    def ttl(self) -> float:
+        """Seconds for which the response is fresh."""
+        return cache_ttl(self.key)
+
+    def is_stale(self) -> bool:
+        """Whether the response is older than its TTL."""
+        return self.age > self.ttl
+
+
+class PendingMutation(BaseModel):
+    """Change to the API data that is waiting to be submitted.
+
+    The password is not stored; it is added to the query parameters when the
+    mutation is sent.
+    """
+
+    key: str
+    method: str
+    endpoint: str
+    params: dict[str, str] = {}
+    body: Optional[dict[str, Any]] = None
+    created: float
+
+    @classmethod
+    def create(
+        cls,
+        method: str,
+        endpoint: str,
+        params: Optional[dict[str, str]] = None,
+        body: Optional[dict[str, Any]] = None,
+    ) -> "PendingMutation":
+        """Create a new mutation, keyed by its contents.
+
+        The key is a hash of the method, endpoint, parameters and body. Mutations
+        also carry the client's timestamp (e.g. the `when` parameter of a coffee
+        use), so only a repeat of the same change gets the same key.
+
+        Args:
+            method (str): HTTP method.
+            endpoint (str): Endpoint relative to the base URL of the API.
+            params (Optional[dict[str, str]], optional): Query parameters. Defaults
+            to None.
+            body (Optional[dict[str, Any]], optional): JSON body. Defaults to None.
+
+        Returns:
+            PendingMutation: The mutation.
+        """
+        params = params or {}
+        content = json.dumps([method, endpoint, params, body], sort_keys=True)
+        return cls(
+            key=hashlib.sha1(content.encode()).hexdigest(),
+            method=method,
+            endpoint=endpoint,
+            params=params,
+            body=body,
+            created=time.time(),
+        )
+
+
+class APIRequestError(Exception):
+    """A request to the Coffee Tracker API did not get a response."""
+
+
+class APIConnectionError(APIRequestError):
+    """The Coffee Tracker API could not be reached; the request was not sent."""
+
+
+class APINoResponseError(APIRequestError):
+    """A request was sent to the Coffee Tracker API but no response was received.
+
+    The API may or may not have applied the request.
+    """
+
+
+class APITimeoutError(APINoResponseError):
+    """The Coffee Tracker API did not respond in time to a request that was sent."""
+
+
+class CoffeeTrackerAPIError(Exception):
+    """Unsuccessful response from the Coffee Tracker API."""
+
+    def __init__(self, status_code: int) -> None:
+        """Create an API error.
+
+        Args:
+            status_code (int): HTTP status code of the response.
+        """
+        self.status_code = status_code
+        super().__init__(f"Request failed with status code {status_code}.")
+
+
 # --- Date and Datetime Formatting ---
 
 
@@ -116,25 +437,760 @@ def get_today_formatted_date() -> str:
 # --- Network ---
 
 
-def is_connected(hostname: str = "1.1.1.1") -> bool:
-    """Whether or not there is a network connection.
+def is_connected(hostname: str, port: int = 443, timeout: float = 2.0) -> bool:
+    """Whether or not a host can be reached over the network.
 
     Args:
-        hostname (str, optional): Hostname to try to reach. Defaults to "1.1.1.1".
+        hostname (str): Hostname to try to reach.
+        port (int, optional): Port to connect to. Defaults to 443.
+        timeout (float, optional): Seconds to wait for a connection. Defaults to 2.0.
 
     Returns:
         bool: Is there a network connection?
     """
     try:
-        host = socket.gethostbyname(hostname)
-        s = socket.create_connection((host, 80), 2)
+        s = socket.create_connection((hostname, port), timeout)
         s.close()
         return True
-    except BaseException:
+    except OSError:
         pass
     return False
 
 
+class Reachability:
+    """Last known reachability of the API, cached on disk.
+
+    The outcome of real API requests is recorded as the connectivity signal so a
+    render does not need to probe the network first. A render uses the last known
+    state even when it is older than the TTL and leaves the probe to the background
+    revalidation.
+    """
+
+    def __init__(self, state_file: Path, ttl: float = REACHABILITY_TTL) -> None:
+        """Create a reachability cache.
+
+        Args:
+            state_file (Path): File where the last known state is stored.
+            ttl (float, optional): Seconds for which the last known state is trusted.
+            Defaults to `REACHABILITY_TTL`.
+        """
+        self.state_file = state_file
+        self.ttl = ttl
+        self._state: Optional[tuple[bool, float]] = None
+        self._lock = threading.Lock()
+        return None
+
+    def _read_state(self) -> Optional[tuple[bool, float]]:
+        if self._state is None:
+            try:
+                data = json.loads(self.state_file.read_text())
+                self._state = (bool(data["connected"]), float(data["checked"]))
+            except (OSError, ValueError, KeyError, TypeError):
+                return None
+        return self._state
+
+    def cached(self) -> Optional[bool]:
+        """Last known reachability if it is not stale.
+
+        Returns:
+            Optional[bool]: Whether the API was reachable, or None if unknown or stale.
+        """
+        state = self._read_state()
+        if state is None or time.time() - state[1] > self.ttl:
+            return None
+        return state[0]
+
+    def last_known(self) -> Optional[bool]:
+        """Last known reachability, however old.
+
+        Returns:
+            Optional[bool]: Whether the API was reachable, or None if never checked.
+        """
+        state = self._read_state()
+        return None if state is None else state[0]
+
+    def record(self, connected: bool) -> None:
+        """Record the current reachability of the API.
+
+        Args:
+            connected (bool): Whether the API was reachable.
+        """
+        with self._lock:
+            self._state = (connected, time.time())
+            try:
+                self.state_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp_file = self.state_file.with_suffix(".tmp")
+                state = {"connected": connected, "checked": self._state[1]}
+                tmp_file.write_text(json.dumps(state))
+                tmp_file.replace(self.state_file)
+            except OSError:
+                pass
+        return None
+
+    def is_connected(self, url: str) -> bool:
+        """Whether or not the API is reachable, probing only if the cache is stale.
+
+        Args:
+            url (str): URL of the API to probe.
+
+        Returns:
+            bool: Is the API reachable?
+        """
+        if (connected := self.cached()) is None:
+            parsed_url = urlparse(url)
+            port = parsed_url.port or (443 if parsed_url.scheme == "https" else 80)
+            connected = is_connected(parsed_url.hostname or "", port=port)
+            self.record(connected)
+        return connected
+
+
+reachability = Reachability(plugin_data_dir / "reachability.json")
+
+
+# --- API Client ---
+
+
+class CoffeeTrackerClient:
+    """Client for the Coffee Tracker API.
+
+    All requests go through a single pooled `requests.Session` so the TCP and TLS
+    connections are reused between calls. Every request has a connect and read
+    timeout, and only idempotent reads are retried (with backoff). The session (and
+    `requests` itself) is only created once the first request is made.
+    """
+
+    def __init__(
+        self,
+        base_url: str = api_url,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        read_timeout: float = READ_TIMEOUT,
+        max_retries: int = MAX_RETRIES,
+        reachability: Optional[Reachability] = None,
+    ) -> None:
+        """Create a Coffee Tracker API client.
+
+        Args:
+            base_url (str, optional): Base URL of the API. Defaults to `api_url`.
+            connect_timeout (float, optional): Seconds to wait to establish a
+            connection. Defaults to `CONNECT_TIMEOUT`.
+            read_timeout (float, optional): Seconds to wait for the server to respond.
+            Defaults to `READ_TIMEOUT`.
+            max_retries (int, optional): Maximum number of retries for idempotent
+            requests. Defaults to `MAX_RETRIES`.
+            reachability (Optional[Reachability], optional): Where to record whether
+            the API could be reached. Defaults to None.
+        """
+        self.base_url = base_url
+        self.reachability = reachability
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self._session: Optional["requests.Session"] = None
+        self._session_lock = threading.Lock()
+        return None
+
+    @property
+    def session(self) -> "requests.Session":
+        """Pooled HTTP session, created on first use."""
+        with self._session_lock:
+            if self._session is None:
+                self._session = self._make_session()
+        return self._session
+
+    def _make_session(self) -> "requests.Session":
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retry = Retry(
+            total=self.max_retries,
+            backoff_factor=0.25,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _record_reachability(self, connected: bool) -> None:
+        if self.reachability is not None:
+            self.reachability.record(connected)
+        return None
+
+    @staticmethod
+    def _failed_to_connect(err: "requests.ConnectionError") -> bool:
+        # Only a failure to open the connection (DNS lookup, refused, connect
+        # timeout, TLS handshake, proxy) means the request was not sent. A
+        # connection that breaks later (e.g. `RemoteDisconnected`) may have
+        # delivered the request.
+        import requests
+        from urllib3.exceptions import (
+            ConnectTimeoutError,
+            MaxRetryError,
+            NewConnectionError,
+            ProxyError,
+            SSLError,
+        )
+
+        if isinstance(err, requests.ConnectTimeout):
+            return True
+        reason = err.args[0] if len(err.args) > 0 else None
+        if not isinstance(reason, MaxRetryError):
+            return False
+        # urllib3 only wraps errors in `MaxRetryError` once it has given up
+        # retrying; errors reading the response of a non-idempotent request are
+        # raised as they are.
+        not_sent = (NewConnectionError, ConnectTimeoutError, SSLError, ProxyError)
+        return isinstance(reason.reason, not_sent)
+
+    def request(self, method: str, endpoint: str, **kwargs: Any) -> "requests.Response":
+        """Make a request to the API.
+
+        Args:
+            method (str): HTTP method.
+            endpoint (str): Endpoint relative to the base URL of the API.
+            **kwargs (Any): Passed on to `requests.Session.request()`.
+
+        Raises:
+            APIConnectionError: Raised if the API could not be reached.
+            APITimeoutError: Raised if the API did not respond in time.
+            APINoResponseError: Raised if the connection failed after the request
+            was sent.
+            APIRequestError: Raised if the request failed for another reason.
+
+        Returns:
+            requests.Response: HTTP response.
+        """
+        session = self.session
+        import requests
+
+        kwargs.setdefault("timeout", self.timeout)
+        try:
+            response = session.request(method, self.base_url + endpoint, **kwargs)
+        except requests.ConnectionError as err:
+            self._record_reachability(False)
+            if self._failed_to_connect(err):
+                raise APIConnectionError(str(err)) from err
+            raise APINoResponseError(str(err)) from err
+        except requests.Timeout as err:
+            self._record_reachability(False)
+            raise APITimeoutError(str(err)) from err
+        except requests.RequestException as err:
+            raise APIRequestError(str(err)) from err
+        self._record_reachability(True)
+        return response
+
+    def get(self, endpoint: str, **kwargs: Any) -> "requests.Response":
+        """Make a GET request to the API."""
+        return self.request("GET", endpoint, **kwargs)
+
+    def put(self, endpoint: str, **kwargs: Any) -> "requests.Response":
+        """Make a PUT request to the API."""
+        return self.request("PUT", endpoint, **kwargs)
+
+    def patch(self, endpoint: str, **kwargs: Any) -> "requests.Response":
+        """Make a PATCH request to the API."""
+        return self.request("PATCH", endpoint, **kwargs)
+
+
+api_client = CoffeeTrackerClient(reachability=reachability)
+
+
+# --- Response Cache ---
+
+
+def cache_ttl(key: str) -> float:
+    """Seconds for which a cached response is fresh.
+
+    Args:
+        key (str): Cache key (endpoint and query).
+
+    Returns:
+        float: TTL for the endpoint of the key.
+    """
+    return CACHE_TTLS.get(key.split("?")[0], DEFAULT_CACHE_TTL)
+
+
+class ResponseCache:
+    """On-disk cache of API responses, keyed by endpoint and query."""
+
+    def __init__(self, db_file: Path) -> None:
+        """Create a response cache.
+
+        Args:
+            db_file (Path): SQLite database file.
+        """
+        self.db_file = db_file
+        return None
+
+    def _connect(self) -> sqlite3.Connection:
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        con = sqlite3.connect(self.db_file, timeout=1.0)
+        con.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(key TEXT PRIMARY KEY, body TEXT NOT NULL, fetched REAL NOT NULL)"
+        )
+        return con
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Get a cached response.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            Optional[CachedResponse]: The cached response, if there is one.
+        """
+        try:
+            with closing(self._connect()) as con:
+                row = con.execute(
+                    "SELECT body, fetched FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        return CachedResponse(key=key, body=json.loads(row[0]), fetched=row[1])
+
+    def set(self, key: str, body: Any) -> None:
+        """Store a response.
+
+        Args:
+            key (str): Cache key.
+            body (Any): JSON body of the response.
+        """
+        try:
+            with closing(self._connect()) as con, con:
+                con.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)",
+                    (key, json.dumps(body), time.time()),
+                )
+        except sqlite3.Error:
+            pass
+        return None
+
+    def increment(self, key: str, by: int = 1) -> bool:
+        """Increment a cached numeric response without changing when it was fetched.
+
+        Args:
+            key (str): Cache key.
+            by (int, optional): Amount to add. Defaults to 1.
+
+        Returns:
+            bool: Whether there was a cached response to increment.
+        """
+        try:
+            with closing(self._connect()) as con, con:
+                cur = con.execute(
+                    "UPDATE responses "
+                    "SET body = CAST(CAST(body AS INTEGER) + ? AS TEXT) WHERE key = ?",
+                    (by, key),
+                )
+        except sqlite3.Error:
+            return False
+        return cur.rowcount > 0
+
+    def entries(self) -> list[CachedResponse]:
+        """All cached responses."""
+        with closing(self._connect()) as con:
+            rows = con.execute(
+                "SELECT key, body, fetched FROM responses ORDER BY key"
+            ).fetchall()
+        return [
+            CachedResponse(key=k, body=json.loads(b), fetched=f) for k, b, f in rows
+        ]
+
+    def delete(self, prefix: str = "") -> int:
+        """Delete cached responses.
+
+        Args:
+            prefix (str, optional): Only delete keys starting with this prefix.
+            Defaults to "" (all keys).
+
+        Returns:
+            int: Number of deleted responses.
+        """
+        with closing(self._connect()) as con, con:
+            cur = con.execute(
+                "DELETE FROM responses WHERE substr(key, 1, ?) = ?",
+                (len(prefix), prefix),
+            )
+        return cur.rowcount
+
+    def evict(self, max_age: float = CACHE_MAX_AGE) -> int:
+        """Delete responses fetched longer than `max_age` seconds ago.
+
+        Args:
+            max_age (float, optional): Maximum age in seconds. Defaults to
+            `CACHE_MAX_AGE`.
+
+        Returns:
+            int: Number of evicted responses.
+        """
+        with closing(self._connect()) as con, con:
+            cur = con.execute(
+                "DELETE FROM responses WHERE fetched < ?", (time.time() - max_age,)
+            )
+        return cur.rowcount
+
+
+response_cache = ResponseCache(plugin_data_dir / "responses.sqlite")
+
+# Endpoints served stale from the cache during this run, to be revalidated.
+stale_endpoints: set[str] = set()
+
+
+def api_get_json(endpoint: str, use_cache: bool = True) -> Any:
+    """GET a JSON response from the API, serving it from the cache when possible.
+
+    A cached response is returned even if it is stale; the endpoint is then added to
+    `stale_endpoints` so it can be revalidated in the background for the next
+    render. A cache miss is fetched from the API and stored.
+
+    Args:
+        endpoint (str): Endpoint (with query) relative to the base URL of the API.
+        use_cache (bool, optional): Use the response cache. Defaults to True.
+
+    Raises:
+        CoffeeTrackerAPIError: Raised if the request to the API fails.
+
+    Returns:
+        Any: Parsed JSON body.
+    """
+    if use_cache and (cached := response_cache.get(endpoint)) is not None:
+        if cached.is_stale():
+            stale_endpoints.add(endpoint)
+        return cached.body
+    response = api_client.get(endpoint)
+    if response.status_code != 200:
+        raise CoffeeTrackerAPIError(response.status_code)
+    body = response.json()
+    if use_cache:
+        response_cache.set(endpoint, body)
+    return body
+
+
+def run_in_background(*args: str) -> None:
+    """Run this script with the given arguments in a detached process.
+
+    Args:
+        *args (str): Command line arguments.
+    """
+    subprocess.Popen(
+        [sys.executable, str(self_path), *args],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    return None
+
+
+def revalidate_in_background(endpoints: set[str]) -> None:
+    """Refresh cached responses in a detached process.
+
+    Args:
+        endpoints (set[str]): Endpoints to refresh.
+    """
+    run_in_background(CLICommands.cache.value, "refresh", *sorted(endpoints))
+    return None
+
+
+# --- Offline Mutation Queue ---
+
+
+class MutationQueue:
+    """Durable queue of mutations to submit to the API, in the order they were made."""
+
+    def __init__(self, db_file: Path, lock_file: Path) -> None:
+        """Create a mutation queue.
+
+        Args:
+            db_file (Path): SQLite database file.
+            lock_file (Path): File locked while the queue is being flushed.
+        """
+        self.db_file = db_file
+        self.lock_file = lock_file
+        return None
+
+    def _connect(self) -> sqlite3.Connection:
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        con = sqlite3.connect(self.db_file, timeout=5.0)
+        con.execute(
+            "CREATE TABLE IF NOT EXISTS mutations "
+            "(seq INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT UNIQUE NOT NULL, "
+            "mutation TEXT NOT NULL)"
+        )
+        con.execute(
+            "CREATE TABLE IF NOT EXISTS failed_mutations "
+            "(seq INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL, "
+            "mutation TEXT NOT NULL, error TEXT NOT NULL, failed REAL NOT NULL)"
+        )
+        return con
+
+    def __len__(self) -> int:
+        """Number of pending mutations."""
+        try:
+            with closing(self._connect()) as con:
+                return con.execute("SELECT COUNT(*) FROM mutations").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def append(self, mutation: PendingMutation) -> None:
+        """Add a mutation to the end of the queue.
+
+        Args:
+            mutation (PendingMutation): Mutation to add. A mutation whose key is
+            already in the queue is ignored.
+        """
+        with closing(self._connect()) as con, con:
+            con.execute(
+                "INSERT OR IGNORE INTO mutations (key, mutation) VALUES (?, ?)",
+                (mutation.key, mutation.model_dump_json()),
+            )
+        return None
+
+    def pending(self, limit: int = -1) -> list[PendingMutation]:
+        """The pending mutations, oldest first.
+
+        Args:
+            limit (int, optional): Maximum number of mutations. Defaults to -1 (all).
+
+        Returns:
+            list[PendingMutation]: Pending mutations.
+        """
+        with closing(self._connect()) as con:
+            rows = con.execute(
+                "SELECT mutation FROM mutations ORDER BY seq LIMIT ?", (limit,)
+            ).fetchall()
+        return [PendingMutation.model_validate_json(row[0]) for row in rows]
+
+    def __contains__(self, key: str) -> bool:
+        """Whether a mutation is pending."""
+        with closing(self._connect()) as con:
+            query = "SELECT 1 FROM mutations WHERE key = ?"
+            return con.execute(query, (key,)).fetchone() is not None
+
+    def remove(self, key: str) -> None:
+        """Remove a mutation from the queue.
+
+        Args:
+            key (str): Key of the mutation.
+        """
+        with closing(self._connect()) as con, con:
+            con.execute("DELETE FROM mutations WHERE key = ?", (key,))
+        return None
+
+    def fail(self, mutation: PendingMutation, error: str) -> None:
+        """Move a mutation that could not be submitted out of the queue.
+
+        Failed mutations are kept (see `failed()`) rather than retried so they do
+        not block the mutations queued after them.
+
+        Args:
+            mutation (PendingMutation): Mutation that failed.
+            error (str): Why the mutation failed.
+        """
+        with closing(self._connect()) as con, con:
+            con.execute(
+                "INSERT INTO failed_mutations (key, mutation, error, failed) "
+                "VALUES (?, ?, ?, ?)",
+                (mutation.key, mutation.model_dump_json(), error, time.time()),
+            )
+            con.execute("DELETE FROM mutations WHERE key = ?", (mutation.key,))
+        return None
+
+    def failed(self) -> list[tuple[PendingMutation, str]]:
+        """The mutations that failed, oldest first.
+
+        Returns:
+            list[tuple[PendingMutation, str]]: Failed mutations and their errors.
+        """
+        with closing(self._connect()) as con:
+            rows = con.execute(
+                "SELECT mutation, error FROM failed_mutations ORDER BY seq"
+            ).fetchall()
+        return [(PendingMutation.model_validate_json(m), e) for m, e in rows]
+
+    @contextmanager
+    def flush_lock(self, wait: float = 0.0) -> Iterator[bool]:
+        """Hold an exclusive lock for flushing the queue.
+
+        Only one process may replay the queue at a time so a mutation is never sent
+        twice.
+
+        Args:
+            wait (float, optional): Seconds to wait for the lock. Defaults to 0.0.
+
+        Yields:
+            Iterator[bool]: Whether the lock was acquired.
+        """
+        self.lock_file.parent.mkdir(parents=True, exist_ok=True)
+        deadline = time.monotonic() + wait
+        with open(self.lock_file, "w") as lock:
+            while True:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except OSError:
+                    if time.monotonic() >= deadline:
+                        yield False
+                        return
+                    time.sleep(0.05)
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+mutation_queue = MutationQueue(
+    plugin_data_dir / "mutations.sqlite", plugin_data_dir / "flush.lock"
+)
+
+
+def apply_mutation_to_cache(mutation: PendingMutation) -> None:
+    """Update the response cache after a mutation was successfully submitted.
+
+    Args:
+        mutation (PendingMutation): Submitted mutation.
+    """
+    if mutation.endpoint.startswith("new_use/"):
+        # Count the cup locally; the server count is only re-fetched once the cached
+        # count expires or the day rolls over (new cache key).
+        if mutation.params.get("when", "").startswith(get_today_formatted_date()):
+            response_cache.increment(cups_today_endpoint())
+    else:
+        response_cache.delete("active_bags/")
+    return None
+
+
+def flush_pending_mutations(
+    password: Optional[str] = None,
+    batch_size: int = FLUSH_BATCH_SIZE,
+    lock_wait: float = 0.0,
+) -> Optional[dict[str, "requests.Response"]]:
+    """Replay queued mutations in order.
+
+    Replay stops at the first mutation that cannot reach the API, keeping it and
+    all later mutations queued. A mutation is removed from the queue once the API
+    has responded to it, whatever the response. A mutation that was sent without
+    getting a response (e.g. it timed out) is also removed since it may already
+    have been applied, and replaying it could apply it twice. A mutation that fails
+    for any other reason is moved aside (see `MutationQueue.fail()`) so it does not
+    block the rest of the queue.
+
+    Args:
+        password (Optional[str], optional): Password for the API. Looked up if
+        needed and not provided. Defaults to None.
+        batch_size (int, optional): Maximum number of mutations to replay. Defaults
+        to `FLUSH_BATCH_SIZE`.
+        lock_wait (float, optional): Seconds to wait for another process that is
+        flushing the queue. Defaults to 0.0.
+
+    Raises:
+        Exception: Invalid password.
+
+    Returns:
+        Optional[dict[str, requests.Response]]: Responses keyed by the mutation key,
+        or `None` if another process is flushing the queue.
+    """
+    responses: dict[str, "requests.Response"] = {}
+    with mutation_queue.flush_lock(wait=lock_wait) as acquired:
+        if not acquired:
+            return None
+        pending = mutation_queue.pending(limit=batch_size)
+        if len(pending) > 0 and password is None:
+            password = get_api_password()
+            if password is None:
+                raise Exception("Password not found.")
+        for mutation in pending:
+            try:
+                response = api_client.request(
+                    mutation.method,
+                    mutation.endpoint,
+                    params={**mutation.params, "password": password},
+                    json=mutation.body,
+                )
+            except APIConnectionError:
+                break
+            except APINoResponseError:
+                mutation_queue.remove(mutation.key)
+                notify(
+                    title="No response to request",
+                    subtitle="Coffee Tracker change may not have been saved.",
+                    body=f"{mutation.method} {mutation.endpoint}",
+                )
+                continue
+            except APIRequestError as err:
+                mutation_queue.fail(mutation, str(err))
+                notify(
+                    title="Request failed",
+                    subtitle="Coffee Tracker change was not saved.",
+                    body=f"{mutation.method} {mutation.endpoint}: {err}",
+                )
+                continue
+            mutation_queue.remove(mutation.key)
+            responses[mutation.key] = response
+            if response.status_code == 200:
+                apply_mutation_to_cache(mutation)
+    return responses
+
+
+def submit_mutation(
+    mutation: PendingMutation,
+    password: str,
+    subtitle: str,
+    on_fail_only: bool = False,
+) -> bool:
+    """Queue a mutation and submit it, along with any earlier queued mutations.
+
+    Args:
+        mutation (PendingMutation): Mutation to submit.
+        password (str): Password for the API.
+        subtitle (str): Subtitle for the notification if the request fails.
+        on_fail_only (bool, optional): Only show the results if there is a failure.
+        Defaults to False.
+
+    Returns:
+        bool: Whether the mutation was submitted (rather than left in the queue).
+    """
+    mutation_queue.append(mutation)
+    responses = flush_pending_mutations(password=password, lock_wait=FLUSH_LOCK_WAIT)
+    if responses is None:
+        if mutation.key not in mutation_queue:
+            # The process holding the lock submitted it and reports any failure.
+            print("The change was submitted along with other queued changes.")
+            return True
+        print("Another change is being submitted; this change was queued.")
+        notify(
+            title="Change queued",
+            subtitle="Another Coffee Tracker change is being submitted.",
+            body="This change will be submitted with the next update.",
+        )
+        return False
+    for key, response in responses.items():
+        if key == mutation.key:
+            display_response_results(
+                response, on_fail_only=on_fail_only, notify=True, subtitle=subtitle
+            )
+        elif response.status_code != 200:
+            notify_failed_request(response, subtitle="Unable to submit queued change.")
+    if mutation.key in responses:
+        return True
+    if mutation.key not in mutation_queue:
+        # Sent without a response, or set aside; a notification was already shown.
+        return False
+    print("Unable to reach the API; the change was queued.")
+    notify(
+        title="Change queued",
+        subtitle="Unable to reach the Coffee Tracker API.",
+        body="It will be submitted once the API can be reached.",
+    )
+    return False
+
+
 # --- Notifications ---
 
 
@@ -157,66 +1213,79 @@ def notify(title: str, subtitle: str, body: str) -> None:
     os.system(cmd)
 
 
-def notify_failed_request(res: requests.Response, subtitle: str) -> None:
+def notify_failed_request(res: "requests.Response", subtitle: str) -> None:
     """Create a notification that a request failed.
 
     Args:
         res (requests.Response): Response of the failed request.
         subtitle (str): Subtitle for the notification.
     """
-    notify(
-        title=f"Request failed ({res.status_code})",
-        subtitle=subtitle,
-        body=res.json()["detail"],
-    )
+    try:
+        body = str(res.json()["detail"])
+    except (ValueError, KeyError, TypeError):
+        body = res.text or str(res.reason)
+    notify(title=f"Request failed ({res.status_code})", subtitle=subtitle, body=body)
+
+
+def response_body(res: "requests.Response") -> Any:
+    """Body of a response, parsed as JSON if possible.
+
+    Args:
+        res (requests.Response): HTTP response.
+
+    Returns:
+        Any: Parsed JSON body or the body text.
+    """
+    try:
+        return res.json()
+    except ValueError:
+        return res.text
 
 
 # --- SwiftBar Plugin UI ---
 
 
-def get_active_coffee_bags() -> list[CoffeeBag]:
+def get_active_coffee_bags(use_cache: bool = True) -> list[CoffeeBag]:
     """List the active coffee bags.
 
-    TODO: Use more appropriate exception classes.
+    Args:
+        use_cache (bool, optional): Use the response cache. Defaults to True.
 
     Raises:
-        BaseException: Raised if the request to the API fails.
+        CoffeeTrackerAPIError: Raised if the request to the API fails.
 
     Returns:
         list[CoffeeBag]: List of coffee bags.
     """
     try:
-        response = requests.get(api_url + "active_bags/")
-    except BaseException:
+        bags = api_get_json("active_bags/", use_cache=use_cache)
+    except APIRequestError:
         return []
+    return [CoffeeBag(key=k, **i) for k, i in bags.items()]
 
-    if response.status_code == 200:
-        return [CoffeeBag(key=k, **i) for k, i in response.json().items()]
-    else:
-        raise BaseException(response.status_code)
 
+def cups_today_endpoint() -> str:
+    """Endpoint for the number of cups of coffee consumed today."""
+    return f"number_of_uses/?since={get_today_formatted_datetime()}"
 
-def get_number_of_cups_today() -> int:
-    """Number of cups of coffee consumed today.
 
-    TODO: Use more appropriate exception classes.
+def menu_endpoints() -> list[str]:
+    """Endpoints (with query) that the menu currently reads."""
+    return ["active_bags/", cups_today_endpoint()]
 
-    Raises:
-        BaseException: Raised if the request to the API fails.
+
+def get_number_of_cups_today(use_cache: bool = True) -> int:
+    """Number of cups of coffee consumed today.
+
+    Args:
+        use_cache (bool, optional): Use the response cache. Defaults to True.
 
     Returns:
         int: Number of cups of coffee.
     """
     try:
-        response = requests.get(
-            api_url + f"number_of_uses/?since={get_today_formatted_datetime()}"
-        )
-    except BaseException:
-        return 0
-
-    if response.status_code == 200:
-        return response.json()
-    else:
+        return api_get_json(cups_today_endpoint(), use_cache=use_cache)
+    except (APIRequestError, CoffeeTrackerAPIError):
         return 0
 
 
@@ -276,12 +1345,14 @@ def make_newbag_command() -> str:
     return cmd
 
 
-def display_add_new_bag() -> None:
-    """Display the option to add a new bag in the SwiftBar dropdown menu."""
-    print("---")
-    print(":plus.circle: Add a new bag... | symbolize=true" + make_newbag_command())
-    print("---")
-    return None
+def menu_add_new_bag() -> str:
+    """Menu item for the option to add a new bag."""
+    return (
+        "---\n"
+        + ":plus.circle: Add a new bag... | symbolize=true"
+        + make_newbag_command()
+        + "\n---"
+    )
 
 
 def get_icon(network_is_connected: bool, num_bags: int) -> tuple[str, str]:
@@ -301,87 +1372,253 @@ def get_icon(network_is_connected: bool, num_bags: int) -> tuple[str, str]:
     return ":drop.fill:", ICON_BROWN
 
 
-def display_menu_bar_icon(network_is_connected: bool, num_bags: int) -> None:
-    """Display the primary menubar app icon.
+def menu_bar_icon(network_is_connected: bool, num_bags: int) -> str:
+    """The primary menubar app icon.
 
     Args:
         network_is_connected (bool): Is there a network connection?
         num_bags (int): Number of coffee bags available.
+
+    Returns:
+        str: Menu bar line followed by the dropdown separator.
     """
     icon, icon_color = get_icon(network_is_connected, num_bags)
-    print(f"{icon} | sfcolor={icon_color} ansi=false emojize=false symbolize=true")
-    print("---")
-    return None
+    return f"{icon} | sfcolor={icon_color} ansi=false emojize=false symbolize=true\n---"
+
 
+def menu_number_of_cups(n_cups: int) -> str:
+    """Menu item with the number of cups consumed today.
 
-def display_number_of_cups() -> None:
-    """Display the number of cups consumed today in the SwiftBar dropdown menu."""
-    n_cups = get_number_of_cups_today()
+    Args:
+        n_cups (int): Number of cups of coffee consumed today.
+
+    Returns:
+        str: Menu item.
+    """
     cups_label = "cup" if n_cups == 1 else "cups"
-    print(f"{n_cups} {cups_label} of ☕️ today")
-    return None
+    return f"{n_cups} {cups_label} of ☕️ today"
 
 
-def display_refresh() -> None:
-    """Display a refresh button in the SwiftBar dropdown menu."""
-    print(":arrow.clockwise: Refresh | refresh=true symbolize=true")
-    return None
+def menu_pending_mutations(n_pending: int) -> str:
+    """Menu item with the number of queued changes.
 
+    Args:
+        n_pending (int): Number of queued changes.
 
-def display_open_docs() -> None:
-    """Display an option to open the online docs in the SwiftBar dropdown menu."""
-    print(f":doc.text: Open online docs | href={api_url}docs symbolize=true")
-    return None
+    Returns:
+        str: Menu item.
+    """
+    label = "change" if n_pending == 1 else "changes"
+    return f":tray.and.arrow.up: {n_pending} pending {label} | symbolize=true"
 
 
-def display_open_streamlit_app() -> None:
-    """Display an option to open the Streamlit app in the SwiftBar dropdown menu."""
-    print(f":chart.xyaxis.line: Streamlit app | href={streamlit_url} symbolize=true")
-    return None
+def menu_footer() -> str:
+    """Menu items to refresh, open the online docs, and open the Streamlit app."""
+    return (
+        ":arrow.clockwise: Refresh | refresh=true symbolize=true\n"
+        + f":doc.text: Open online docs | href={api_url}docs symbolize=true\n"
+        + f":chart.xyaxis.line: Streamlit app | href={streamlit_url} symbolize=true"
+    )
 
 
-def display_coffee_bag_choices(coffee_bags: list[CoffeeBag]) -> None:
-    """Display the coffee bag choices in the SwiftBar dropdown menu.
+def menu_coffee_bag_choices(coffee_bags: list[CoffeeBag]) -> str:
+    """Menu items for the coffee bag choices.
 
     Args:
         coffee_bags (list[CoffeeBag]): Coffee bags.
+
+    Returns:
+        str: Menu items.
     """
+    if len(coffee_bags) == 0:
+        return "No bags available 😦"
+    lines: list[str] = []
     for bag in coffee_bags:
-        default_cmd = make_default_command(bag)
-        option_cmd = make_option_command(bag)
-        print(str(bag) + " | " + default_cmd)
-        print("finish " + str(bag) + " | " + option_cmd)
-    return None
+        bag_name = str(bag)
+        lines.append(bag_name + " | " + make_default_command(bag))
+        lines.append("finish " + bag_name + " | " + make_option_command(bag))
+    return "\n".join(lines)
 
 
-def display_no_coffee_bags_message() -> None:
-    """Display that no bags of coffee are available (sad)."""
-    print("No bags available 😦")
-    return None
+class MenuCache:
+    """On-disk cache of the pre-rendered coffee bag menu block.
 
+    Only the most recent block is kept; it is keyed on a hash of the active bags,
+    the path and modification time of this script and `MENU_CACHE_VERSION`, so it
+    is reused until any of them changes.
+    """
 
-def swiftbar_plugin():
-    """The default plugin to interact with the Coffee Counter API."""
-    network_connection = is_connected()
-    coffee_bags: list[CoffeeBag] = (
-        get_active_coffee_bags() if network_connection else []
-    )
+    def __init__(self, cache_file: Path) -> None:
+        """Create a menu cache.
+
+        Args:
+            cache_file (Path): File storing the pre-rendered block.
+        """
+        self.cache_file = cache_file
+        return None
+
+    @staticmethod
+    def make_key(coffee_bags: list[CoffeeBag]) -> str:
+        """Cache key for a list of coffee bags.
+
+        Args:
+            coffee_bags (list[CoffeeBag]): Coffee bags.
+
+        Returns:
+            str: Hash of the bags' keys and names, this script and the cache version.
+        """
+        try:
+            script_mtime = Path(__file__).stat().st_mtime_ns
+        except OSError:
+            script_mtime = 0
+        script = f"{MENU_CACHE_VERSION}\0{self_path.as_posix()}\0{script_mtime}"
+        digest = hashlib.sha1(script.encode())
+        for bag in coffee_bags:
+            digest.update(f"\0{bag.key}\0{bag.brand}\0{bag.name}".encode())
+        return digest.hexdigest()
+
+    def coffee_bag_choices(self, coffee_bags: list[CoffeeBag]) -> str:
+        """Menu items for the coffee bag choices, rendered only if not cached.
+
+        Args:
+            coffee_bags (list[CoffeeBag]): Coffee bags.
+
+        Returns:
+            str: Menu items.
+        """
+        key = self.make_key(coffee_bags)
+        try:
+            cached = json.loads(self.cache_file.read_text())
+            if cached["key"] == key:
+                return cached["block"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        block = menu_coffee_bag_choices(coffee_bags)
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix(".tmp")
+            tmp_file.write_text(json.dumps({"key": key, "block": block}))
+            tmp_file.replace(self.cache_file)
+        except OSError:
+            pass
+        return block
+
+
+menu_cache = MenuCache(plugin_data_dir / "menu.json")
+
+
+class PhaseTimer:
+    """Wall time of the named phases of a render."""
+
+    def __init__(self) -> None:
+        """Create a phase timer."""
+        self.timings: dict[str, float] = {}
+        return None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a phase.
+
+        Args:
+            name (str): Name of the phase.
+
+        Yields:
+            Iterator[None]: Context in which the phase runs.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = time.perf_counter() - start
+
+
+def fetch_plugin_data(
+    use_cache: bool = True, timer: Optional[PhaseTimer] = None
+) -> tuple[list[CoffeeBag], int]:
+    """Concurrently request the active coffee bags and the number of cups today.
+
+    Both requests are issued at once so the total wait is about that of the slowest
+    request instead of the sum of the two.
 
-    display_menu_bar_icon(network_connection, num_bags=len(coffee_bags))
+    Args:
+        use_cache (bool, optional): Use the response cache. Defaults to True.
+        timer (Optional[PhaseTimer], optional): Timer for the requests. Defaults to
+        None.
+
+    Returns:
+        tuple[list[CoffeeBag], int]: Active coffee bags and number of cups today.
+    """
+    timer = timer or PhaseTimer()
+
+    def _get_bags() -> list[CoffeeBag]:
+        with timer.phase("fetch bags"):
+            return get_active_coffee_bags(use_cache)
+
+    def _get_cups() -> int:
+        with timer.phase("fetch count"):
+            return get_number_of_cups_today(use_cache)
+
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+        bags_future = executor.submit(_get_bags)
+        cups_future = executor.submit(_get_cups)
+        coffee_bags = bags_future.result()
+        n_cups = cups_future.result()
+    return coffee_bags, n_cups
+
+
+def swiftbar_plugin(timer: Optional[PhaseTimer] = None, use_cache: bool = True) -> None:
+    """The default plugin to interact with the Coffee Counter API.
 
+    Args:
+        timer (Optional[PhaseTimer], optional): Timer for the phases of the render.
+        Defaults to None.
+        use_cache (bool, optional): Use the response cache. Defaults to True.
+    """
+    timer = timer or PhaseTimer()
+    revalidate = False
+    with timer.phase("connectivity"):
+        known = reachability.cached() if use_cache else None
+        if known is None and use_cache:
+            # Render from the last known state; the background revalidation probes.
+            known = reachability.last_known()
+            revalidate = known is not None
+        if known is None:
+            known = reachability.is_connected(api_client.base_url)
+        network_connection = known
+    coffee_bags: list[CoffeeBag] = []
+    n_cups = 0
     if network_connection:
-        if len(coffee_bags) == 0:
-            display_no_coffee_bags_message()
-        else:
-            display_coffee_bag_choices(coffee_bags)
-        display_number_of_cups()
-        display_add_new_bag()
+        with timer.phase("fetch"):
+            coffee_bags, n_cups = fetch_plugin_data(use_cache=use_cache, timer=timer)
+        network_connection = reachability.cached() is not False
+
+    with timer.phase("render"):
+        _write_menu(network_connection, coffee_bags, n_cups)
+
+    if stale_endpoints or revalidate:
+        revalidate_in_background(stale_endpoints)
+    if network_connection and len(mutation_queue) > 0:
+        run_in_background(CLICommands.queue.value, "flush")
+    return None
+
+
+def _write_menu(
+    network_connection: bool, coffee_bags: list[CoffeeBag], n_cups: int
+) -> None:
+    menu: list[str] = [menu_bar_icon(network_connection, num_bags=len(coffee_bags))]
+    if network_connection:
+        menu.append(menu_cache.coffee_bag_choices(coffee_bags))
+        menu.append(menu_number_of_cups(n_cups))
+        menu.append(menu_add_new_bag())
     else:
-        print("No network connection.")
-    print("---")
-    display_refresh()
-    display_open_docs()
-    display_open_streamlit_app()
+        menu.append("No network connection.")
+    n_pending = len(mutation_queue)
+    if n_pending > 0:
+        menu.append(menu_pending_mutations(n_pending))
+    menu.append("---")
+    menu.append(menu_footer())
+    sys.stdout.write("\n".join(menu) + "\n")
+    sys.stdout.flush()
     return None
 
 
@@ -389,7 +1626,7 @@ def swiftbar_plugin():
 
 
 def display_response_results(
-    res: requests.Response,
+    res: "requests.Response",
     on_fail_only=False,
     notify: bool = False,
     subtitle: Optional[str] = None,
@@ -408,16 +1645,15 @@ def display_response_results(
         if on_fail_only:
             return
         print("Successful!")
-        print(res.json())
+        print(response_body(res))
     else:
         print(f"Error: status code: {res.status_code}")
-        print(res.json())
+        print(response_body(res))
         if notify and subtitle is not None:
             notify_failed_request(res, subtitle=subtitle)
     return None
 
 
-@app.command(CLICommands.use_bag)
 def put_coffee_use(bag_id: str) -> None:
     """Submit a new coffee use to the API.
 
@@ -431,19 +1667,16 @@ def put_coffee_use(bag_id: str) -> None:
     if password is None:
         raise Exception("Password not found.")
 
-    when = get_now_formatted_datetime()
-    url = api_url + f"new_use/{bag_id}?password={password}&when={when}"
-    response = requests.put(url)
-    display_response_results(
-        response, notify=True, subtitle="Unable to put coffee use."
+    mutation = PendingMutation.create(
+        "PUT", f"new_use/{bag_id}", params={"when": get_now_formatted_datetime()}
     )
+    submit_mutation(mutation, password, subtitle="Unable to put coffee use.")
     return None
 
 
 # --- Deactivate a bag ---
 
 
-@app.command(CLICommands.deactivate_bag)
 def deactivate_coffee_bag(bag_id: str) -> None:
     """Deactivate a bag in the data base.
 
@@ -457,19 +1690,17 @@ def deactivate_coffee_bag(bag_id: str) -> None:
     if password is None:
         raise Exception("Password not found.")
 
-    d = get_today_formatted_date()
-    url = api_url + f"deactivate/{bag_id}?password={password}&when={d}"
-    response = requests.patch(url)
-    display_response_results(
-        response, notify=True, subtitle="Unable to deactivate bag."
+    mutation = PendingMutation.create(
+        "PATCH", f"deactivate/{bag_id}", params={"when": get_today_formatted_date()}
     )
+    submit_mutation(mutation, password, subtitle="Unable to deactivate bag.")
     return None
 
 
 # --- New bag ---
 
 
-def submit_new_bag(bag: CoffeeBag) -> None:
+def submit_new_bag(bag: CoffeeBag) -> bool:
     """Submit the information for a new bag of coffee to the API.
 
     TODO: Make a custom error class instead of using BaseException.
@@ -479,19 +1710,20 @@ def submit_new_bag(bag: CoffeeBag) -> None:
 
     Raises:
         BaseException: If there is no password available for the API.
+
+    Returns:
+        bool: Whether the bag was submitted (rather than queued for later).
     """
     password = get_api_password()
     if password is None:
         raise BaseException("Password not found.")
-    url = api_url + f"new_bag/?password={password}"
     bag_data = bag.dict()
     bag_data["start"] = bag.start.strftime(date_format())
     _ = bag_data.pop("key", None)
-    response = requests.put(url, json=bag_data)
-    display_response_results(
-        response, on_fail_only=True, notify=True, subtitle="Unable to add a new bag."
+    mutation = PendingMutation.create("PUT", "new_bag/", body=bag_data)
+    return submit_mutation(
+        mutation, password, subtitle="Unable to add a new bag.", on_fail_only=True
     )
-    return None
 
 
 def confirm_new_bag_info(bag: CoffeeBag) -> bool:
@@ -511,80 +1743,592 @@ def confirm_new_bag_info(bag: CoffeeBag) -> bool:
     print(f"> weight: {bag.weight}")
     print(f">  start: {bag.start}")
     print("-" * len(head_msg))
+    import typer
+
     return typer.confirm("Submit bag?", default=True)
 
 
-@app.command(CLICommands.new_bag)
-def new_bag(
-    brand: str = typer.Option(..., prompt="bag brand"),
-    name: str = typer.Option(..., prompt="bag name"),
-    weight: float = typer.Option(340.0, prompt="weight"),
-    start: datetime = typer.Option(
-        default=get_today_formatted_date(), prompt="starting date"
-    ),
-) -> None:
+def new_bag(brand: str, name: str, weight: float, start: datetime) -> None:
     """Add a new bag to the data base.
 
     This command gets data from the user interactively if called from the CLI.
 
     Args:
-        brand (str, optional): Brand of the bag.
-        name (str, optional): Name of the bag.
-        weight (float, optional): Weight of the bag in grams. Defaults to 340.0.
-        start (datetime, optional): When the bag was started. Defaults to today.
-
-    Returns:
-        [type]: [description]
+        brand (str): Brand of the bag.
+        name (str): Name of the bag.
+        weight (float): Weight of the bag in grams.
+        start (datetime): When the bag was started.
     """
     bag = CoffeeBag(brand=brand, name=name, weight=weight, start=start, key="stand-in")
     if not confirm_new_bag_info(bag):
         print("Bag not submitted.")
-    else:
-        submit_new_bag(bag)
+    elif submit_new_bag(bag):
         print("New bag submitted!")
     return None
 
 
+# --- Response cache ---
+
+
+def show_cache() -> None:
+    """List the cached API responses with their age and TTL."""
+    entries = response_cache.entries()
+    if len(entries) == 0:
+        print("The response cache is empty.")
+    for entry in entries:
+        status = "stale" if entry.is_stale() else "fresh"
+        print(f"{entry.key}")
+        print(f"  age: {entry.age:.0f}s  ttl: {entry.ttl:.0f}s  ({status})")
+    return None
+
+
+def clear_cache(prefix: str = "") -> None:
+    """Delete cached API responses.
+
+    Args:
+        prefix (str, optional): Only clear keys starting with this prefix. Defaults
+        to all keys.
+    """
+    n_deleted = response_cache.delete(prefix)
+    print(f"Deleted {n_deleted} cached response(s).")
+    return None
+
+
+def refresh_cache(endpoints: Optional[list[str]] = None) -> None:
+    """Re-fetch cached API responses and evict old ones.
+
+    The reachability of the API is refreshed first (probing only if it is stale)
+    and nothing is fetched if the API cannot be reached. Responses the menu no
+    longer reads (e.g. the cup counts of past days) are not re-fetched so they age
+    out of the cache.
+
+    Args:
+        endpoints (Optional[list[str]], optional): Endpoints (with query) to refresh.
+        Defaults to the endpoints the menu reads (`menu_endpoints()`).
+    """
+    response_cache.evict()
+    if not reachability.is_connected(api_client.base_url):
+        return None
+    if not endpoints:
+        endpoints = menu_endpoints()
+    for endpoint in endpoints:
+        try:
+            body = api_get_json(endpoint, use_cache=False)
+        except (APIRequestError, CoffeeTrackerAPIError):
+            continue
+        response_cache.set(endpoint, body)
+    return None
+
+
+# --- Mutation queue ---
+
+
+def show_queue() -> None:
+    """List the queued changes, oldest first, and the changes that failed."""
+    pending = mutation_queue.pending()
+    if len(pending) == 0:
+        print("No changes are queued.")
+    for mutation in pending:
+        made = datetime.fromtimestamp(mutation.created).strftime(datetime_format())
+        print(f"{made}  {mutation.method} {mutation.endpoint}  {mutation.params}")
+    if len(failed := mutation_queue.failed()) > 0:
+        print("Failed changes (not submitted):")
+    for mutation, error in failed:
+        made = datetime.fromtimestamp(mutation.created).strftime(datetime_format())
+        print(f"{made}  {mutation.method} {mutation.endpoint}  {error}")
+    return None
+
+
+def flush_queue() -> None:
+    """Submit the queued changes to the API."""
+    n_pending = len(mutation_queue)
+    responses = flush_pending_mutations()
+    if responses is None:
+        print("Another process is submitting the queued changes.")
+        return None
+    for response in responses.values():
+        if response.status_code != 200:
+            notify_failed_request(response, subtitle="Unable to submit queued change.")
+    print(f"Submitted {len(responses)} of {n_pending} queued change(s).")
+    return None
+
+
 # --- Profiling ---
 
 
-@app.command(CLICommands.profile)
-def profile_plugin(n_loops: int = 10) -> None:
-    """Profile the plugin.
+def _start_stand_in_api(
+    latency: float, jitter: float = 0.0, error_rate: float = 0.0, n_bags: int = 3
+) -> tuple[Any, str]:
+    """Start a local stand-in for the Coffee Tracker API in a background thread.
+
+    Args:
+        latency (float): Seconds to wait before answering each request.
+        jitter (float, optional): Maximum extra seconds of random latency. Defaults
+        to 0.0.
+        error_rate (float, optional): Fraction of requests answered with a 500 error.
+        Defaults to 0.0.
+        n_bags (int, optional): Number of active coffee bags. Defaults to 3.
+
+    Returns:
+        tuple[Any, str]: The running HTTP server and its base URL.
+    """
+    import random
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    active_bags = {
+        f"bag-{i}": {
+            "brand": "Brand",
+            "name": f"Coffee {i}",
+            "weight": 340.0,
+            "start": "2022-01-01",
+        }
+        for i in range(n_bags)
+    }
+
+    class StandInHandler(BaseHTTPRequestHandler):
+        def _respond(self, body: Any) -> None:
+            time.sleep(latency + random.uniform(0.0, jitter))
+            if random.random() < error_rate:
+                status, body = 500, {"detail": "Injected error."}
+            else:
+                status = 200
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return None
+
+        def do_GET(self) -> None:  # noqa: N802
+            if self.path.startswith("/active_bags/"):
+                self._respond(active_bags)
+            elif self.path.startswith("/number_of_uses/"):
+                self._respond(2)
+            else:
+                self.send_error(404)
+            return None
+
+        def do_PUT(self) -> None:  # noqa: N802
+            length = int(self.headers.get("Content-Length", 0))
+            self.rfile.read(length)
+            self._respond({})
+            return None
+
+        def do_PATCH(self) -> None:  # noqa: N802
+            self._respond({})
+            return None
+
+        def log_message(self, *args: Any) -> None:
+            return None
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/"
+
+
+def _timer_summary(timers: list[float]) -> dict[str, float]:
+    from statistics import mean, quantiles
+
+    if len(timers) == 1:
+        timers = timers * 2
+    percentiles = quantiles(timers, n=100, method="inclusive")
+    return {
+        "mean": mean(timers),
+        "p50": percentiles[49],
+        "p95": percentiles[94],
+        "p99": percentiles[98],
+    }
+
+
+def _print_timer_summary(label: str, timers: list[float]) -> None:
+    summary = _timer_summary(timers)
+    print(label)
+    for stat, value in summary.items():
+        print(f"  {stat:>4}: {value * 1000:9.2f} ms")
+    return None
+
+
+def _use_plugin_data_dir(data_dir: Path) -> None:
+    global reachability, api_client, response_cache, mutation_queue, menu_cache
+    reachability = Reachability(data_dir / "reachability.json")
+    api_client = CoffeeTrackerClient(
+        base_url=api_client.base_url, reachability=reachability
+    )
+    response_cache = ResponseCache(data_dir / "responses.sqlite")
+    mutation_queue = MutationQueue(
+        data_dir / "mutations.sqlite", data_dir / "flush.lock"
+    )
+    menu_cache = MenuCache(data_dir / "menu.json")
+    return None
+
+
+BENCHMARK_PHASES: Final[list[str]] = [
+    "connectivity",
+    "fetch bags",
+    "fetch count",
+    "fetch",
+    "render",
+    "total",
+]
+
+
+def profile_plugin(
+    n_loops: int = 50,
+    n_warmup: int = 5,
+    latency: float = 0.05,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    n_bags: int = 3,
+    use_cache: bool = False,
+    sequential: bool = False,
+    json_output: Optional[Path] = None,
+) -> None:
+    """Benchmark rendering the plugin against a local stand-in for the API.
+
+    Each render is timed per phase (connectivity, fetching the bags and the count,
+    rendering) with its output suppressed. The plugin data directory is a temporary
+    directory, so the caches start empty.
 
     Args:
-        n_loops (int, optional): Number of loops. Defaults to 10.
+        n_loops (int, optional): Number of timed renders. Defaults to 50.
+        n_warmup (int, optional): Number of untimed renders first. Defaults to 5.
+        latency (float, optional): Latency of the stand-in API in seconds. Defaults
+        to 0.05.
+        jitter (float, optional): Maximum extra random latency in seconds. Defaults
+        to 0.0.
+        error_rate (float, optional): Fraction of requests that fail. Defaults to
+        0.0.
+        n_bags (int, optional): Number of active coffee bags. Defaults to 3.
+        use_cache (bool, optional): Use the response cache. Defaults to False.
+        sequential (bool, optional): Fetch the bags and count one after the other.
+        Defaults to False.
+        json_output (Optional[Path], optional): File to write the results to as JSON.
+        Defaults to None.
     """
-    from statistics import mean, median, stdev
-    from time import time
+    import io
+    import tempfile
+    from contextlib import redirect_stdout
+
+    global api_client, FETCH_WORKERS
+    if sequential:
+        FETCH_WORKERS = 1
+    server, stand_in_url = _start_stand_in_api(
+        latency=latency, jitter=jitter, error_rate=error_rate, n_bags=n_bags
+    )
+    api_client = CoffeeTrackerClient(base_url=stand_in_url)
 
-    timers: list[float] = []
-    for _ in range(n_loops):
-        a = time()
-        swiftbar_plugin()
-        b = time()
-        timers.append(b - a)
-    print(f"     mean: {mean(timers)}")
-    print(f"   median: {median(timers)}")
-    print(f"std. dev.: {stdev(timers)}")
+    timings: dict[str, list[float]] = {phase: [] for phase in BENCHMARK_PHASES}
+    n_failed = 0
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            _use_plugin_data_dir(Path(tmp_dir))
+            for i in range(n_warmup + n_loops):
+                timer = PhaseTimer()
+                try:
+                    with redirect_stdout(io.StringIO()), timer.phase("total"):
+                        swiftbar_plugin(timer=timer, use_cache=use_cache)
+                except CoffeeTrackerAPIError:
+                    if i >= n_warmup:
+                        n_failed += 1
+                    continue
+                if i < n_warmup:
+                    continue
+                for phase in BENCHMARK_PHASES:
+                    timings[phase].append(timer.timings.get(phase, 0.0))
+    finally:
+        server.shutdown()
+
+    results = {
+        phase: _timer_summary(timers)
+        for phase, timers in timings.items()
+        if any(t > 0 for t in timers)
+    }
+    for phase in results:
+        _print_timer_summary(phase, timings[phase])
+    print(f"failed renders: {n_failed} of {n_loops}")
+
+    if json_output is not None:
+        config = {
+            "n_loops": n_loops,
+            "n_warmup": n_warmup,
+            "latency": latency,
+            "jitter": jitter,
+            "error_rate": error_rate,
+            "n_bags": n_bags,
+            "use_cache": use_cache,
+            "sequential": sequential,
+        }
+        report = {
+            "config": config,
+            "failed": n_failed,
+            "results": results,
+            "samples": timings,
+        }
+        json_output.write_text(json.dumps(report, indent=2))
     return None
 
 
-# --- Main ---
+def credential_benchmark(
+    n_clicks: int = 10, keyring_delay: float = 0.25, interval: float = 0.2
+) -> None:
+    """Compare per-click password lookup latency with and without the cache.
 
-# This is a bit of a workaround to get a default option without providing a command.
-# https://github.com/tiangolo/typer/issues/18#issuecomment-617089716
-@app.callback(invoke_without_command=True)
-def default(ctx: typer.Context) -> None:
-    """A hack to have a default command with the Typer CLI.
+    The keychain is replaced by a stand-in keyring backend that takes
+    `keyring_delay` seconds per lookup.
 
     Args:
-        ctx (typer.Context): The context supplied by Typer.
+        n_clicks (int, optional): Number of simulated clicks. Defaults to 10.
+        keyring_delay (float, optional): Seconds per stand-in keyring lookup.
+        Defaults to 0.25.
+        interval (float, optional): Seconds between clicks. Defaults to 0.2.
     """
-    if ctx.invoked_subcommand is None:
-        swiftbar_plugin()
+    import tempfile
+    from time import perf_counter
+
+    import keyring
+    from keyring.backend import KeyringBackend
+
+    class StandInKeyring(KeyringBackend):
+        priority = 1  # type: ignore
+
+        def get_password(self, service: str, username: str) -> Optional[str]:
+            time.sleep(keyring_delay)
+            return "stand-in-password"
+
+        def set_password(self, service: str, username: str, password: str) -> None:
+            return None
+
+        def delete_password(self, service: str, username: str) -> None:
+            return None
+
+    keyring.set_keyring(StandInKeyring())
+
+    global credential_cache
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for label, lifetime in (("keychain", 0.0), ("credential cache", 60.0)):
+            credential_cache = CredentialCache(
+                Path(tmp_dir) / "credential.sock", lifetime=lifetime
+            )
+            timers: list[float] = []
+            for _ in range(n_clicks):
+                a = perf_counter()
+                get_api_password()
+                timers.append(perf_counter() - a)
+                time.sleep(interval)
+            credential_cache.stop()
+            _print_timer_summary(label, timers)
+    return None
+
+
+IMPORTTIME_COMMANDS: Final[dict[str, list[str]]] = {
+    "(render)": [],
+    CLICommands.use_bag.value: [CLICommands.use_bag.value, "bag-0"],
+    CLICommands.deactivate_bag.value: [CLICommands.deactivate_bag.value, "bag-0"],
+    CLICommands.new_bag.value: [CLICommands.new_bag.value, "--help"],
+    f"{CLICommands.cache.value} show": [CLICommands.cache.value, "show"],
+    f"{CLICommands.queue.value} show": [CLICommands.queue.value, "show"],
+}
+
+
+# Keyring backend for the benchmark subprocesses, selected with
+# `PYTHON_KEYRING_BACKEND` so the commands that need the password run to completion.
+STAND_IN_KEYRING_MODULE: Final[str] = """
+from keyring.backend import KeyringBackend
+
+
+class StandInKeyring(KeyringBackend):
+    priority = 1
+
+    def get_password(self, service, username):
+        return "stand-in-password"
+
+    def set_password(self, service, username, password):
+        return None
+
+    def delete_password(self, service, username):
+        return None
+"""
+
+
+def _parse_importtime(stderr: str) -> dict[str, float]:
+    """Cumulative import time (ms) of each top-level import in `-X importtime` output.
+
+    Args:
+        stderr (str): Standard error of a process run with `-X importtime`.
+
+    Returns:
+        dict[str, float]: Import time in milliseconds keyed by module.
+    """
+    import_times: dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if name.startswith("  "):
+            continue  # Imported by another module.
+        import_times[name.strip()] = int(cumulative) / 1000
+    return import_times
+
+
+def importtime_benchmark(n_runs: int = 5, top: int = 5) -> None:
+    """Report the per-module import cost of each CLI command.
+
+    Each command is run in a fresh interpreter with `-X importtime` against a local
+    stand-in for the API, a temporary plugin data directory and a stand-in keyring
+    that returns a password, so each command takes the same path as a real click.
+    The credential cache is disabled so every run looks up the password.
+
+    Args:
+        n_runs (int, optional): Runs per command; the median is reported. Defaults
+        to 5.
+        top (int, optional): Number of most expensive modules to list. Defaults to 5.
+    """
+    import tempfile
+    from statistics import median
+
+    server, stand_in_url = _start_stand_in_api(latency=0.0)
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            (Path(tmp_dir) / "stand_in_keyring.py").write_text(STAND_IN_KEYRING_MODULE)
+            python_path = os.pathsep.join(
+                filter(None, [tmp_dir, os.getenv("PYTHONPATH")])
+            )
+            env = os.environ | {
+                "COFFEE_TRACKER_API_URL": stand_in_url,
+                "SWIFTBAR_PLUGIN_DATA_PATH": tmp_dir,
+                "PYTHONPATH": python_path,
+                "PYTHON_KEYRING_BACKEND": "stand_in_keyring.StandInKeyring",
+                "COFFEE_TRACKER_CREDENTIAL_LIFETIME": "0",
+            }
+            for label, args in IMPORTTIME_COMMANDS.items():
+                runs: list[dict[str, float]] = []
+                for _ in range(n_runs):
+                    proc = subprocess.run(
+                        [sys.executable, "-X", "importtime", str(self_path), *args],
+                        env=env,
+                        stdin=subprocess.DEVNULL,
+                        stdout=subprocess.DEVNULL,
+                        stderr=subprocess.PIPE,
+                        text=True,
+                    )
+                    runs.append(_parse_importtime(proc.stderr))
+                    if proc.returncode != 0:
+                        print(f"{label}: exited with status {proc.returncode}")
+                modules = {m for run in runs for m in run}
+                costs = {m: median(run.get(m, 0.0) for run in runs) for m in modules}
+                total = median(sum(run.values()) for run in runs)
+                print(f"{label}: {total:.1f} ms")
+                for module in sorted(costs, key=lambda m: -costs[m])[:top]:
+                    print(f"  {costs[module]:8.1f} ms  {module}")
+    finally:
+        server.shutdown()
     return None
 
 
+# --- CLI ---
+
+
+def build_cli() -> "typer.Typer":
+    """Build the Typer CLI.
+
+    Returns:
+        typer.Typer: The CLI application.
+    """
+    import typer
+
+    app = typer.Typer()
+    app.command(CLICommands.use_bag)(put_coffee_use)
+    app.command(CLICommands.deactivate_bag)(deactivate_coffee_bag)
+
+    @app.command(CLICommands.new_bag)
+    def _new_bag(
+        brand: str = typer.Option(..., prompt="bag brand"),
+        name: str = typer.Option(..., prompt="bag name"),
+        weight: float = typer.Option(340.0, prompt="weight"),
+        start: datetime = typer.Option(
+            default=get_today_formatted_date(), prompt="starting date"
+        ),
+    ) -> None:
+        """Add a new bag to the data base."""
+        new_bag(brand=brand, name=name, weight=weight, start=start)
+
+    app.command(CLICommands.profile)(profile_plugin)
+    app.command(CLICommands.importtime)(importtime_benchmark)
+
+    cache_app = typer.Typer(help="Inspect and manage the local API response cache.")
+    cache_app.command("show")(show_cache)
+
+    @cache_app.command("clear")
+    def _clear_cache(
+        prefix: str = typer.Argument("", help="Only clear keys with this prefix.")
+    ) -> None:
+        """Delete cached API responses."""
+        clear_cache(prefix)
+
+    @cache_app.command("refresh")
+    def _refresh_cache(
+        endpoints: Optional[list[str]] = typer.Argument(
+            None, help="Endpoints to refresh. Defaults to the endpoints the menu reads."
+        )
+    ) -> None:
+        """Re-fetch cached API responses and evict old ones."""
+        refresh_cache(endpoints)
+
+    app.add_typer(cache_app, name=CLICommands.cache.value)
+
+    queue_app = typer.Typer(help="Inspect and submit changes queued while offline.")
+    queue_app.command("show")(show_queue)
+    queue_app.command("flush")(flush_queue)
+    app.add_typer(queue_app, name=CLICommands.queue.value)
+
+    credentials_app = typer.Typer(help="Manage the cached API password.")
+
+    @credentials_app.command("agent", hidden=True)
+    def _credential_agent(
+        socket_file: Path = typer.Option(...),
+        lifetime: float = typer.Option(...),
+        listen_fd: int = typer.Option(...),
+        lock_fd: int = typer.Option(...),
+    ) -> None:
+        """Hold the password read from standard input and serve it."""
+        CredentialCache(socket_file, lifetime=lifetime).serve(
+            sys.stdin.read(), listen_fd=listen_fd, lock_fd=lock_fd
+        )
+
+    @credentials_app.command("clear")
+    def _clear_credentials() -> None:
+        """Forget the cached API password."""
+        if credential_cache.stop():
+            print("Cleared the cached password.")
+        else:
+            print("No password is cached.")
+
+    credentials_app.command("benchmark")(credential_benchmark)
+    app.add_typer(credentials_app, name=CLICommands.credentials.value)
+
+    # This is a bit of a workaround to get a default option without providing a
+    # command. https://github.com/tiangolo/typer/issues/18#issuecomment-617089716
+    @app.callback(invoke_without_command=True)
+    def default(ctx: typer.Context) -> None:
+        """A hack to have a default command with the Typer CLI.
+
+        Args:
+            ctx (typer.Context): The context supplied by Typer.
+        """
+        if ctx.invoked_subcommand is None:
+            swiftbar_plugin()
+        return None
+
+    return app
+
+
+# --- Main ---
+
+
 if __name__ == "__main__":
-    app()
+    # Rendering is by far the most common invocation, so skip building the CLI.
+    if len(sys.argv) == 1:
+        swiftbar_plugin()
+    else:
+        build_cli()()
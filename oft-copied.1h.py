@@ -12,8 +12,11 @@
 # <swiftbar.hideSwiftBar>true</swiftbar.hideSwiftBar>
 
 import os
+import shlex
+import shutil
 import subprocess
 import sys
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Final, Optional
 
@@ -95,19 +98,84 @@ def swiftbar_app() -> None:
 # --- Adding text to Pasteboard ---
 
 
+class ClipboardError(Exception):
+    """Text could not be copied to the clipboard."""
+
+
+@dataclass
+class CommandClipboard:
+    """Clipboard written through the standard input of a helper command."""
+
+    command: list[str]
+    timeout: float = 5.0  # seconds
+
+    def copy(self, text: str) -> None:
+        """Write the text to the helper command and wait for it to finish.
+
+        Args:
+            text (str): Text to copy.
+
+        Raises:
+            ClipboardError: The command could not be run, timed out, or failed.
+        """
+        # Helpers like `xclip` stay in the background to serve the clipboard, so
+        # their output is not captured (that would wait for them to exit). pbcopy
+        # decodes its input with the locale, which SwiftBar does not set.
+        try:
+            result = subprocess.run(
+                self.command,
+                input=text.encode("utf-8"),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                env=os.environ | {"LC_CTYPE": "UTF-8"},
+                timeout=self.timeout,
+            )
+        except (OSError, subprocess.TimeoutExpired) as err:
+            raise ClipboardError(f"`{self.command[0]}` failed: {err}") from err
+        if result.returncode != 0:
+            msg = f"`{self.command[0]}` exited with status {result.returncode}"
+            raise ClipboardError(msg)
+        return None
+
+
+# Clipboard helper commands, in order of preference.
+CLIPBOARD_COMMANDS: Final[dict[str, list[str]]] = {
+    "pbcopy": ["pbcopy"],
+    "wl-copy": ["wl-copy"],
+    "xclip": ["xclip", "-selection", "clipboard"],
+    "xsel": ["xsel", "--clipboard", "--input"],
+}
+
+
+def clipboard() -> CommandClipboard:
+    """Clipboard helper for this machine.
+
+    Set `SWIFTBAR_CLIPBOARD` to a command that reads the text from standard input
+    (e.g. `tee copied.txt`) to override the helper found on the `PATH`.
+
+    Raises:
+        ClipboardError: No clipboard helper was found.
+
+    Returns:
+        CommandClipboard: Clipboard helper.
+    """
+    if (override := os.getenv("SWIFTBAR_CLIPBOARD")) is not None:
+        return CommandClipboard(shlex.split(override))
+    for name, command in CLIPBOARD_COMMANDS.items():
+        if name == "wl-copy" and os.getenv("WAYLAND_DISPLAY") is None:
+            continue
+        if shutil.which(name) is not None:
+            return CommandClipboard(command)
+    raise ClipboardError("no clipboard command found (pbcopy, wl-copy, xclip, xsel)")
+
+
 def copy_text(title: str) -> None:
     """Copy desired text to pasteboard.
 
     Args:
         title (str): Title of the copyable text in the look-up table.
     """
-    text = COPY_TEXT_INFO[title]
-    p1 = subprocess.Popen(["echo", text], stdout=subprocess.PIPE)
-    p2 = subprocess.Popen(["pbcopy"], stdin=p1.stdout)
-    if p1.stdout is not None:
-        p1.stdout.close()
-    if p2.stdin is not None:
-        p2.stdin.close()
+    clipboard().copy(COPY_TEXT_INFO[title])
     return None
 
 
@@ -129,7 +197,11 @@ def main(to_copy: Optional[str] = None) -> None:
         to_copy (Optional[str], optional): Title of the text to copy. Defaults to None.
     """
     if to_copy is not None:
-        copy_text(to_copy)
+        try:
+            copy_text(to_copy)
+        except ClipboardError as err:
+            typer.echo(f"Could not copy '{to_copy}': {err}", err=True)
+            raise typer.Exit(1)
     else:
         swiftbar_app()
     return None
@@ -1,12 +1,12 @@
 #!/Users/admin/Documents/SwiftBar-Plugins/.env/bin/python3
 
-"""SwiftBar plugin to show all conda environments and copy to clipboard."""
+"""SwiftBar plugin to show all Python virtual environments and copy to clipboard."""
 
-# <bitbar.title>Display Conda Virtual Environments</bitbar.title>
+# <bitbar.title>Display Python Virtual Environments</bitbar.title>
 # <bitbar.version>v1.0</bitbar.version>
 # <bitbar.author>Joshua Cook</bitbar.author>
 # <bitbar.author.github>jhrcook</bitbar.author.github>
-# <bitbar.desc>List the conda virtual environments and copy to clipboard.</bitbar.desc>
+# <bitbar.desc>List the Python virtual environments and copy to clipboard.</bitbar.desc>
 # <bitbar.image>https://docs.conda.io/en/latest/_images/conda_logo.svg</bitbar.image>
 # <bitbar.dependencies>python3</bitbar.dependencies>
 # <swiftbar.hideAbout>true</swiftbar.hideAbout>
@@ -14,12 +14,764 @@
 # <swiftbar.hideSwiftBar>true</swiftbar.hideSwiftBar>
 
 
+import fcntl
+import json
+import os
+import re
+import shlex
+import shutil
 import subprocess
 import sys
+import threading
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
 from pathlib import Path
+from time import perf_counter
+from typing import Callable, Final, Iterator, Optional
 
 self_path = Path(sys.argv[0])
 
+if (data_path := os.getenv("SWIFTBAR_PLUGIN_DATA_PATH")) is not None:
+    plugin_data_dir = Path(data_path)
+else:
+    plugin_data_dir = Path.home() / ".cache" / "swiftbar-python-virtual-environments"
+
+
+# --- Conda environment discovery ---
+
+# Usual installation directories of conda, in the home directory and system-wide.
+CONDA_ROOT_NAMES: Final[tuple[str, ...]] = (
+    "miniconda3",
+    "miniconda",
+    "anaconda3",
+    "anaconda",
+    "miniforge3",
+    "mambaforge",
+    "micromamba",
+)
+SYSTEM_CONDA_ROOTS: Final[tuple[Path, ...]] = (
+    Path("/opt/homebrew/Caskroom/miniforge/base"),
+    Path("/opt/homebrew/Caskroom/miniconda/base"),
+    Path("/opt/miniconda3"),
+    Path("/opt/anaconda3"),
+    Path("/usr/local/miniconda3"),
+    Path("/usr/local/anaconda3"),
+)
+
+_ENVS_DIRS_BLOCK: Final = re.compile(r"^envs_dirs:\s*$")
+_ENVS_DIRS_FLOW: Final = re.compile(r"^envs_dirs:\s*\[(.*)\]\s*$")
+_YAML_LIST_ITEM: Final = re.compile(r"^\s+-\s+(.+?)\s*$")
+
+
+def _conda_root_candidates(home: Path) -> list[Path]:
+    return [home / name for name in CONDA_ROOT_NAMES] + list(SYSTEM_CONDA_ROOTS)
+
+
+def conda_roots(home: Path) -> list[Path]:
+    """Conda installations found on this machine.
+
+    Args:
+        home (Path): Home directory.
+
+    Returns:
+        list[Path]: Conda installations.
+    """
+    roots: list[Path] = []
+    if (conda_exe := os.getenv("CONDA_EXE")) is not None:
+        roots.append(Path(conda_exe).parent.parent)
+    roots += _conda_root_candidates(home)
+    return [r for r in dict.fromkeys(roots) if (r / "conda-meta").is_dir()]
+
+
+def _expand_path(path: str) -> Path:
+    return Path(os.path.expandvars(path.strip().strip("'\""))).expanduser()
+
+
+def read_envs_dirs(condarc: Path) -> list[Path]:
+    """Read the `envs_dirs` setting of a `.condarc` file.
+
+    Only the block (`- dir` lines) and flow (`[dir, dir]`) list forms of the
+    setting are understood, which avoids depending on a YAML parser.
+
+    Args:
+        condarc (Path): Conda configuration file.
+
+    Returns:
+        list[Path]: Directories listed in `envs_dirs`.
+    """
+    try:
+        lines = condarc.read_text().splitlines()
+    except OSError:
+        return []
+    envs_dirs: list[Path] = []
+    in_block = False
+    for line in lines:
+        if in_block and (item := _YAML_LIST_ITEM.match(line)) is not None:
+            envs_dirs.append(_expand_path(item.group(1)))
+            continue
+        in_block = _ENVS_DIRS_BLOCK.match(line) is not None
+        if (flow := _ENVS_DIRS_FLOW.match(line)) is not None:
+            envs_dirs += [_expand_path(d) for d in flow.group(1).split(",") if d]
+    return envs_dirs
+
+
+def _condarc_files(home: Path, roots: list[Path]) -> list[Path]:
+    condarc_files = [
+        home / ".condarc",
+        home / ".conda" / ".condarc",
+        home / ".config" / "conda" / ".condarc",
+        home / ".config" / "conda" / "condarc",
+    ]
+    condarc_files += [r / ".condarc" for r in roots]
+    if (condarc := os.getenv("CONDARC")) is not None:
+        condarc_files.append(Path(condarc))
+    return condarc_files
+
+
+def conda_envs_dirs(home: Path, roots: list[Path]) -> list[Path]:
+    """Directories that conda creates named environments in.
+
+    Args:
+        home (Path): Home directory.
+        roots (list[Path]): Conda installations.
+
+    Returns:
+        list[Path]: Environment directories, in conda's order of precedence.
+    """
+    envs_dirs: list[Path] = []
+    for var in ("CONDA_ENVS_PATH", "CONDA_ENVS_DIRS"):
+        envs_dirs += [
+            _expand_path(d) for d in os.getenv(var, "").split(os.pathsep) if d
+        ]
+    for condarc_file in _condarc_files(home, roots):
+        envs_dirs += read_envs_dirs(condarc_file)
+    envs_dirs += [r / "envs" for r in roots]
+    envs_dirs.append(home / ".conda" / "envs")
+    return list(dict.fromkeys(envs_dirs))
+
+
+def _is_conda_env(prefix: Path) -> bool:
+    return (prefix / "conda-meta").is_dir()
+
+
+def _is_conda_root(prefix: Path) -> bool:
+    return (prefix / "condabin").is_dir()
+
+
+def discover_conda_envs(
+    home: Optional[Path] = None, roots: Optional[list[Path]] = None
+) -> Optional[list[Path]]:
+    """Find the conda environments without running conda.
+
+    Environments are read from `~/.conda/environments.txt` (where conda registers
+    every environment it creates) and found by scanning the `envs_dirs` for
+    directories with a `conda-meta` directory.
+
+    Args:
+        home (Optional[Path], optional): Home directory. Defaults to the user's.
+        roots (Optional[list[Path]], optional): Conda installations. Defaults to
+        `conda_roots(home)`.
+
+    Returns:
+        Optional[list[Path]]: Environment prefixes (excluding the base
+        environments) sorted by name, or `None` if no conda installation was found.
+    """
+    home = home or Path.home()
+    roots = conda_roots(home) if roots is None else roots
+    environments_txt = home / ".conda" / "environments.txt"
+    if len(roots) == 0 and not environments_txt.is_file():
+        return None
+
+    prefixes: list[Path] = []
+    try:
+        prefixes += [_expand_path(p) for p in environments_txt.read_text().split("\n")]
+    except OSError:
+        pass
+    for envs_dir in conda_envs_dirs(home, roots):
+        try:
+            prefixes += list(envs_dir.iterdir())
+        except OSError:
+            continue
+
+    envs: dict[Path, Path] = {}
+    for prefix in prefixes:
+        if prefix.name and _is_conda_env(prefix) and not _is_conda_root(prefix):
+            envs.setdefault(prefix.resolve(), prefix)
+    return sorted(envs.values(), key=lambda p: (p.name, str(p)))
+
+
+def list_conda_envs_subprocess() -> list[Path]:
+    """Find the conda environments with `conda env list` (slow).
+
+    Returns:
+        list[Path]: Environment prefixes, excluding the base environment.
+    """
+    try:
+        conda_envs_subp = subprocess.run(
+            ["conda", "env", "list"], stdout=subprocess.PIPE
+        )
+    except OSError:
+        return []
+    prefixes: list[Path] = []
+    for conda_env in conda_envs_subp.stdout.decode("utf-8").split("\n"):
+        if "#" not in conda_env and conda_env.strip() != "":
+            fields = conda_env.split()
+            if fields[0] != "base":
+                prefixes.append(Path(fields[-1]))
+    return prefixes
+
+
+def conda_discovery_inputs(home: Path, roots: list[Path]) -> list[Path]:
+    """Files and directories whose changes can change the conda environments.
+
+    Args:
+        home (Path): Home directory.
+        roots (list[Path]): Conda installations.
+
+    Returns:
+        list[Path]: Paths to watch, whether or not they exist.
+    """
+    inputs = [r / "conda-meta" for r in _conda_root_candidates(home)]
+    inputs += _condarc_files(home, roots)
+    inputs.append(home / ".conda" / "environments.txt")
+    inputs += conda_envs_dirs(home, roots)
+    return list(dict.fromkeys(inputs))
+
+
+# --- Other environment managers ---
+
+# Names of project-local virtual environments.
+PROJECT_VENV_NAMES: Final[tuple[str, ...]] = (".venv", "venv", ".env")
+
+
+def _child_dirs(directory: Path) -> list[Path]:
+    try:
+        return sorted(p for p in directory.iterdir() if p.is_dir())
+    except OSError:
+        return []
+
+
+def _is_venv(prefix: Path) -> bool:
+    return (prefix / "pyvenv.cfg").is_file()
+
+
+def _env_paths(var: str) -> list[Path]:
+    return [_expand_path(p) for p in os.getenv(var, "").split(os.pathsep) if p]
+
+
+def virtualenvs_dir(home: Path) -> Path:
+    """Directory of virtualenvwrapper's environments."""
+    return (_env_paths("WORKON_HOME") or [home / ".virtualenvs"])[0]
+
+
+def pyenv_versions_dir(home: Path) -> Path:
+    """Directory of pyenv's Python versions and virtual environments."""
+    return (_env_paths("PYENV_ROOT") or [home / ".pyenv"])[0] / "versions"
+
+
+def poetry_virtualenvs_dirs(home: Path) -> list[Path]:
+    """Directories where poetry may create virtual environments."""
+    dirs = _env_paths("POETRY_VIRTUALENVS_PATH")
+    dirs += [d / "virtualenvs" for d in _env_paths("POETRY_CACHE_DIR")]
+    dirs += [d / "pypoetry" / "virtualenvs" for d in _env_paths("XDG_CACHE_HOME")]
+    dirs.append(home / "Library" / "Caches" / "pypoetry" / "virtualenvs")
+    dirs.append(home / ".cache" / "pypoetry" / "virtualenvs")
+    return list(dict.fromkeys(dirs))
+
+
+def project_roots() -> list[Path]:
+    """Directories of projects that may have a local virtual environment.
+
+    Set with `PYTHON_ENVS_PROJECT_ROOTS` (separated like `PATH`). No directories
+    are searched by default: walking folders like `~/Documents` triggers a macOS
+    privacy prompt.
+    """
+    return _env_paths("PYTHON_ENVS_PROJECT_ROOTS")
+
+
+# --- Discovery backends ---
+
+
+@dataclass(frozen=True)
+class Environment:
+    """A Python environment."""
+
+    name: str
+    prefix: Path
+    copy_text: str  # Copied to the clipboard when the environment is clicked.
+
+
+@dataclass
+class Discovery:
+    """Environments found by a discovery backend."""
+
+    envs: list[Environment]
+    inputs: list[Path]  # Paths whose changes can change the environments.
+
+
+@dataclass(frozen=True)
+class DiscoveryBackend:
+    """Source of environments."""
+
+    title: str
+    discover: Callable[[Path], Discovery]
+    time_budget: float  # seconds
+
+
+def discover_conda(home: Path) -> Discovery:
+    """Conda environments, running `conda` only if its installation is not found."""
+    roots = conda_roots(home)
+    inputs = conda_discovery_inputs(home, roots)
+    if (prefixes := discover_conda_envs(home, roots)) is None:
+        prefixes = list_conda_envs_subprocess()
+    envs = [Environment(p.name, p, copy_text=p.name) for p in prefixes]
+    return Discovery(envs, inputs)
+
+
+def _venvs_in(directory: Path) -> list[Environment]:
+    return [
+        Environment(p.name, p, copy_text=str(p))
+        for p in _child_dirs(directory)
+        if _is_venv(p)
+    ]
+
+
+def discover_virtualenvs(home: Path) -> Discovery:
+    """Environments of virtualenvwrapper."""
+    envs_dir = virtualenvs_dir(home)
+    return Discovery(_venvs_in(envs_dir), [envs_dir])
+
+
+def discover_pyenv(home: Path) -> Discovery:
+    """Python versions and virtual environments of pyenv."""
+    versions_dir = pyenv_versions_dir(home)
+    envs = [Environment(p.name, p, copy_text=p.name) for p in _child_dirs(versions_dir)]
+    return Discovery(envs, [versions_dir])
+
+
+def discover_poetry(home: Path) -> Discovery:
+    """Virtual environments that poetry created in its cache."""
+    envs_dirs = poetry_virtualenvs_dirs(home)
+    return Discovery([e for d in envs_dirs for e in _venvs_in(d)], envs_dirs)
+
+
+def discover_project_venvs(home: Path) -> Discovery:
+    """Virtual environments in the projects under the project roots."""
+    envs: list[Environment] = []
+    roots = project_roots()
+    inputs = list(roots)
+    for project in (p for root in roots for p in _child_dirs(root)):
+        inputs.append(project)
+        for name in PROJECT_VENV_NAMES:
+            if _is_venv(prefix := project / name):
+                envs.append(Environment(project.name, prefix, copy_text=str(prefix)))
+    return Discovery(envs, inputs)
+
+
+# Discovery backends, in order of precedence for environments found by several.
+DISCOVERY_BACKENDS: Final[dict[str, DiscoveryBackend]] = {
+    "conda": DiscoveryBackend("Conda", discover_conda, time_budget=5.0),
+    "pyenv": DiscoveryBackend("pyenv", discover_pyenv, time_budget=1.0),
+    "virtualenvs": DiscoveryBackend(
+        "virtualenvwrapper", discover_virtualenvs, time_budget=1.0
+    ),
+    "poetry": DiscoveryBackend("Poetry", discover_poetry, time_budget=1.0),
+    "project": DiscoveryBackend("Projects", discover_project_venvs, time_budget=2.0),
+}
+
+
+def run_backends(
+    home: Path, backends: dict[str, DiscoveryBackend]
+) -> dict[str, Optional[Discovery]]:
+    """Run the discovery backends concurrently, each within its time budget.
+
+    Each backend runs in a daemon thread so one that runs out of time is abandoned
+    and does not keep the process alive.
+
+    Args:
+        home (Path): Home directory.
+        backends (dict[str, DiscoveryBackend]): Discovery backends.
+
+    Returns:
+        dict[str, Optional[Discovery]]: Results of the backends, or `None` for the
+        ones that failed or ran out of time.
+    """
+    results: dict[str, Discovery] = {}
+
+    def _run(name: str, backend: DiscoveryBackend) -> None:
+        try:
+            results[name] = backend.discover(home)
+        except OSError:
+            pass
+
+    start = perf_counter()
+    threads = {
+        name: threading.Thread(target=_run, args=(name, backend), daemon=True)
+        for name, backend in backends.items()
+    }
+    for thread in threads.values():
+        thread.start()
+    for name, thread in threads.items():
+        thread.join(max(0.0, start + backends[name].time_budget - perf_counter()))
+    return {name: results.get(name) for name in backends}
+
+
+def merge_environments(
+    results: dict[str, Optional[Discovery]],
+) -> dict[str, list[Environment]]:
+    """Merge the environments of the backends, without duplicates.
+
+    An environment found by several backends (e.g. a pyenv virtual environment
+    that is also a project's `.venv`) is kept in the first backend's group.
+
+    Args:
+        results (dict[str, Optional[Discovery]]): Results of the backends.
+
+    Returns:
+        dict[str, list[Environment]]: Environments grouped by backend.
+    """
+    seen: set[Path] = set()
+    grouped: dict[str, list[Environment]] = {}
+    for name, discovery in results.items():
+        grouped[name] = []
+        for env in discovery.envs if discovery is not None else []:
+            if (resolved := env.prefix.resolve()) not in seen:
+                seen.add(resolved)
+                grouped[name].append(env)
+    return grouped
+
+
+# --- Environment cache ---
+
+# Environment variables that change where environments are discovered.
+DISCOVERY_ENV_VARS: Final[tuple[str, ...]] = (
+    "CONDA_EXE",
+    "CONDA_ENVS_PATH",
+    "CONDA_ENVS_DIRS",
+    "CONDARC",
+    "WORKON_HOME",
+    "PYENV_ROOT",
+    "POETRY_VIRTUALENVS_PATH",
+    "POETRY_CACHE_DIR",
+    "XDG_CACHE_HOME",
+    "PYTHON_ENVS_PROJECT_ROOTS",
+)
+
+# Bump when the format of the cached environments changes.
+ENVIRONMENT_CACHE_VERSION: Final[int] = 2
+
+
+def _mtime(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+class EnvironmentCache:
+    """Discovered environments, kept until the paths they came from change.
+
+    Creating or removing an environment changes the modification time of its
+    environments directory and of `environments.txt`, so checking that the cache
+    is valid only takes a handful of `stat` calls.
+    """
+
+    def __init__(self, cache_file: Path) -> None:
+        """Create an environment cache.
+
+        Args:
+            cache_file (Path): JSON file storing the environments.
+        """
+        self.cache_file = cache_file
+        return None
+
+    def load(self) -> Optional[dict[str, list[Environment]]]:
+        """Load the cached environments.
+
+        Returns:
+            Optional[dict[str, list[Environment]]]: Environments grouped by backend,
+            if the cache is valid.
+        """
+        try:
+            data = json.loads(self.cache_file.read_text())
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != ENVIRONMENT_CACHE_VERSION:
+            return None
+        if data.get("env") != {v: os.getenv(v) for v in DISCOVERY_ENV_VARS}:
+            return None
+        for path, mtime in data.get("mtimes", {}).items():
+            if _mtime(Path(path)) != mtime:
+                return None
+        return {
+            backend: [Environment(n, Path(p), c) for n, p, c in envs]
+            for backend, envs in data.get("envs", {}).items()
+        }
+
+    def save(self, envs: dict[str, list[Environment]], inputs: list[Path]) -> None:
+        """Save the environments.
+
+        Args:
+            envs (dict[str, list[Environment]]): Environments grouped by backend.
+            inputs (list[Path]): Paths the environments were discovered from.
+        """
+        data = {
+            "version": ENVIRONMENT_CACHE_VERSION,
+            "env": {v: os.getenv(v) for v in DISCOVERY_ENV_VARS},
+            "mtimes": {str(p): _mtime(p) for p in inputs},
+            "envs": {
+                backend: [(e.name, str(e.prefix), e.copy_text) for e in group]
+                for backend, group in envs.items()
+            },
+        }
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix(".tmp")
+            tmp_file.write_text(json.dumps(data))
+            tmp_file.replace(self.cache_file)
+        except OSError:
+            pass
+        return None
+
+    def clear(self) -> None:
+        """Delete the cached environments."""
+        self.cache_file.unlink(missing_ok=True)
+        return None
+
+
+environment_cache = EnvironmentCache(plugin_data_dir / "environments.json")
+
+
+def discover_environments(use_cache: bool = True) -> dict[str, list[Environment]]:
+    """Environments of all of the discovery backends.
+
+    The result is only cached if every backend finished within its time budget.
+
+    Args:
+        use_cache (bool, optional): Use the environment cache if it is valid.
+        Defaults to True.
+
+    Returns:
+        dict[str, list[Environment]]: Environments grouped by backend.
+    """
+    if use_cache and (envs := environment_cache.load()) is not None:
+        return envs
+    results = run_backends(Path.home(), DISCOVERY_BACKENDS)
+    envs = merge_environments(results)
+    if all(r is not None for r in results.values()):
+        inputs = [p for r in results.values() if r is not None for p in r.inputs]
+        environment_cache.save(envs, list(dict.fromkeys(inputs)))
+    return envs
+
+
+# --- Environment statistics ---
+
+
+@dataclass
+class EnvironmentStats:
+    """Statistics of an environment."""
+
+    metadata_dir: str  # Directory whose modification time tracks the packages.
+    metadata_mtime: Optional[int]
+    python_version: Optional[str]
+    n_packages: int
+    disk_usage: int  # bytes
+
+
+def _site_packages(prefix: Path) -> Optional[Path]:
+    candidates = sorted(prefix.glob("lib/python*/site-packages"))
+    candidates.append(prefix / "Lib" / "site-packages")
+    return next((d for d in candidates if d.is_dir()), None)
+
+
+def _metadata_dir(prefix: Path) -> Path:
+    # Installing or removing a package changes the modification time of this
+    # directory.
+    if (conda_meta := prefix / "conda-meta").is_dir():
+        return conda_meta
+    return _site_packages(prefix) or prefix
+
+
+def _pyvenv_version(prefix: Path) -> Optional[str]:
+    try:
+        lines = (prefix / "pyvenv.cfg").read_text().splitlines()
+    except OSError:
+        return None
+    config = dict(line.partition("=")[::2] for line in lines)
+    config = {k.strip(): v.strip() for k, v in config.items()}
+    return config.get("version") or config.get("version_info")
+
+
+def _disk_usage(prefix: Path) -> int:
+    # Conda hard-links files from its package cache, so count each inode once.
+    seen: set[tuple[int, int]] = set()
+    total = 0
+    dirs = [prefix]
+    while dirs:
+        try:
+            entries = list(os.scandir(dirs.pop()))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(Path(entry.path))
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if (stat.st_dev, stat.st_ino) not in seen:
+                seen.add((stat.st_dev, stat.st_ino))
+                total += stat.st_size
+    return total
+
+
+def compute_environment_stats(prefix: Path) -> EnvironmentStats:
+    """Compute the statistics of an environment (slow for large environments).
+
+    Args:
+        prefix (Path): Environment prefix.
+
+    Returns:
+        EnvironmentStats: Statistics of the environment.
+    """
+    metadata_dir = _metadata_dir(prefix)
+    mtime = _mtime(metadata_dir)
+    python_version: Optional[str] = None
+    n_packages = 0
+    for meta_file in (prefix / "conda-meta").glob("*.json"):
+        n_packages += 1
+        # Package records are named "<name>-<version>-<build>.json".
+        name, _, version_build = meta_file.stem.rpartition("-")[0].rpartition("-")
+        if name == "python":
+            python_version = version_build
+    if n_packages == 0 and (site_packages := _site_packages(prefix)) is not None:
+        n_packages = sum(1 for _ in site_packages.glob("*.dist-info"))
+        n_packages += sum(1 for _ in site_packages.glob("*.egg-info"))
+        python_version = _pyvenv_version(prefix)
+        if python_version is None and site_packages.parent.name != "Lib":
+            python_version = site_packages.parent.name.removeprefix("python")
+    return EnvironmentStats(
+        metadata_dir=str(metadata_dir),
+        metadata_mtime=mtime,
+        python_version=python_version,
+        n_packages=n_packages,
+        disk_usage=_disk_usage(prefix),
+    )
+
+
+class StatsStore:
+    """Statistics of the environments, computed by the background indexer."""
+
+    def __init__(self, stats_file: Path, lock_file: Path) -> None:
+        """Create a statistics store.
+
+        Args:
+            stats_file (Path): JSON file storing the statistics.
+            lock_file (Path): Lock file held by the indexer.
+        """
+        self.stats_file = stats_file
+        self.lock_file = lock_file
+        return None
+
+    def load(self) -> dict[str, EnvironmentStats]:
+        """Statistics keyed by environment prefix."""
+        try:
+            data = json.loads(self.stats_file.read_text())
+            return {p: EnvironmentStats(**s) for p, s in data.items()}
+        except (OSError, ValueError, TypeError):
+            return {}
+
+    def save(self, stats: dict[str, EnvironmentStats]) -> None:
+        """Save the statistics.
+
+        Args:
+            stats (dict[str, EnvironmentStats]): Statistics keyed by environment
+            prefix.
+        """
+        try:
+            self.stats_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.stats_file.with_suffix(".tmp")
+            tmp_file.write_text(json.dumps({p: asdict(s) for p, s in stats.items()}))
+            tmp_file.replace(self.stats_file)
+        except OSError:
+            pass
+        return None
+
+    @contextmanager
+    def indexer_lock(self) -> Iterator[bool]:
+        """Hold an exclusive lock for indexing, without waiting for it.
+
+        Yields:
+            Iterator[bool]: Whether the lock was acquired.
+        """
+        self.lock_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_file, "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+stats_store = StatsStore(plugin_data_dir / "stats.json", plugin_data_dir / "index.lock")
+
+
+def is_stale(stats: Optional[EnvironmentStats]) -> bool:
+    """Whether the statistics of an environment need to be (re)computed.
+
+    Only the metadata directory recorded with the statistics is checked (a single
+    `stat` call), so this is cheap enough to run for every environment on render.
+    """
+    return stats is None or _mtime(Path(stats.metadata_dir)) != stats.metadata_mtime
+
+
+def index_environment_stats() -> None:
+    """Compute the statistics of new and changed environments.
+
+    Only environments whose package metadata (`conda-meta` or `site-packages`)
+    changed since they were indexed are recomputed. The statistics are saved after
+    each environment so the menu shows them as soon as possible. Nothing is done if
+    another indexer is running.
+    """
+    with stats_store.indexer_lock() as acquired:
+        if not acquired:
+            return None
+        envs = {
+            str(e.prefix): e.prefix
+            for group in discover_environments().values()
+            for e in group
+        }
+        stats = {p: s for p, s in stats_store.load().items() if p in envs}
+        for key, prefix in envs.items():
+            old = stats.get(key)
+            # Also catch a metadata directory that moved, e.g. a new Python version.
+            moved = old is not None and old.metadata_dir != str(_metadata_dir(prefix))
+            if is_stale(old) or moved:
+                stats[key] = compute_environment_stats(prefix)
+                stats_store.save(stats)
+        stats_store.save(stats)
+    return None
+
+
+def start_indexer() -> None:
+    """Start the statistics indexer in the background."""
+    subprocess.Popen(
+        [sys.executable, str(self_path), "--index"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    return None
+
+
+# --- SwiftBar ---
+
 
 def _header() -> None:
     print(":c.circle: | symbolize=true")
@@ -28,38 +780,305 @@ def _header() -> None:
     return None
 
 
+def _format_size(n_bytes: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n_bytes < 1000:
+            break
+        n_bytes /= 1000
+    else:
+        unit = "TB"
+    return f"{n_bytes:.0f} {unit}" if unit == "B" else f"{n_bytes:.1f} {unit}"
+
+
+def _stats_submenu(stats: Optional[EnvironmentStats]) -> list[str]:
+    if stats is None:
+        return ["--Statistics pending… | color=gray"]
+    python_version = stats.python_version or "not installed"
+    return [
+        f"--Python {python_version} | color=gray",
+        f"--{stats.n_packages} packages | color=gray",
+        f"--{_format_size(stats.disk_usage)} on disk | color=gray",
+    ]
+
+
 def print_environments() -> None:
-    """Print the environments to standard output."""
+    """Print the environments to standard output.
+
+    Statistics are read from the indexer's results and never computed here; the
+    indexer is started in the background if any are missing or out of date.
+    """
     _header()
-    conda_envs_subp = subprocess.run(["conda", "env", "list"], stdout=subprocess.PIPE)
-    conda_envs = conda_envs_subp.stdout.decode("utf-8").split("\n")
-    for conda_env in conda_envs:
-        if "#" not in conda_env and conda_env != "":
-            env = conda_env.strip().split(" ")[0]
-            env = Path(env).name
-            if env != "base":
-                msg = f"{env} | bash={self_path.as_posix()} param1={env}"
-                msg += " refresh=true terminal=false"
-                print(msg)
+    all_stats = stats_store.load()
+    needs_indexing = False
+    for backend, envs in discover_environments().items():
+        if len(envs) == 0:
+            continue
+        print("---")
+        print(f"{DISCOVERY_BACKENDS[backend].title} | color=gray")
+        for env in envs:
+            action = f"bash={self_path.as_posix()} param1='{env.copy_text}'"
+            action += " refresh=true terminal=false"
+            print(f"{env.name} | {action}")
+            print(f"--Copy to clipboard | {action}")
+            stats = all_stats.get(str(env.prefix))
+            for line in _stats_submenu(stats):
+                print(line)
+            needs_indexing = needs_indexing or is_stale(stats)
+    if needs_indexing:
+        start_indexer()
 
     print("---")
     print("Refresh | refresh=true")
+    msg = f"Rescan environments | bash={self_path.as_posix()} param1=--rescan"
+    msg += " refresh=true terminal=false"
+    print(msg)
     return None
 
 
+# --- Clipboard ---
+
+
+class ClipboardError(Exception):
+    """Text could not be copied to the clipboard."""
+
+
+@dataclass
+class CommandClipboard:
+    """Clipboard written through the standard input of a helper command."""
+
+    command: list[str]
+    timeout: float = 5.0  # seconds
+
+    def copy(self, text: str) -> None:
+        """Write the text to the helper command and wait for it to finish.
+
+        Args:
+            text (str): Text to copy.
+
+        Raises:
+            ClipboardError: The command could not be run, timed out, or failed.
+        """
+        # Helpers like `xclip` stay in the background to serve the clipboard, so
+        # their output is not captured (that would wait for them to exit). pbcopy
+        # decodes its input with the locale, which SwiftBar does not set.
+        try:
+            result = subprocess.run(
+                self.command,
+                input=text.encode("utf-8"),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                env=os.environ | {"LC_CTYPE": "UTF-8"},
+                timeout=self.timeout,
+            )
+        except (OSError, subprocess.TimeoutExpired) as err:
+            raise ClipboardError(f"`{self.command[0]}` failed: {err}") from err
+        if result.returncode != 0:
+            msg = f"`{self.command[0]}` exited with status {result.returncode}"
+            raise ClipboardError(msg)
+        return None
+
+
+# Clipboard helper commands, in order of preference.
+CLIPBOARD_COMMANDS: Final[dict[str, list[str]]] = {
+    "pbcopy": ["pbcopy"],
+    "wl-copy": ["wl-copy"],
+    "xclip": ["xclip", "-selection", "clipboard"],
+    "xsel": ["xsel", "--clipboard", "--input"],
+}
+
+
+def clipboard() -> CommandClipboard:
+    """Clipboard helper for this machine.
+
+    Set `SWIFTBAR_CLIPBOARD` to a command that reads the text from standard input
+    (e.g. `tee copied.txt`) to override the helper found on the `PATH`.
+
+    Raises:
+        ClipboardError: No clipboard helper was found.
+
+    Returns:
+        CommandClipboard: Clipboard helper.
+    """
+    if (override := os.getenv("SWIFTBAR_CLIPBOARD")) is not None:
+        return CommandClipboard(shlex.split(override))
+    for name, command in CLIPBOARD_COMMANDS.items():
+        if name == "wl-copy" and os.getenv("WAYLAND_DISPLAY") is None:
+            continue
+        if shutil.which(name) is not None:
+            return CommandClipboard(command)
+    raise ClipboardError("no clipboard command found (pbcopy, wl-copy, xclip, xsel)")
+
+
 def copy_env_to_clipboard(env: str) -> None:
-    """Copy an environment name to clipboard."""
-    p1 = subprocess.Popen(["echo", env], stdout=subprocess.PIPE)
-    p2 = subprocess.Popen(["pbcopy"], stdin=p1.stdout)
-    if p1.stdout is not None:
-        p1.stdout.close()
-    if p2.stdin is not None:
-        p2.stdin.close()
+    """Copy an environment's name or path to clipboard."""
+    clipboard().copy(env)
+    return None
+
+
+# --- Benchmark ---
+
+
+def write_synthetic_conda_tree(home: Path, n_envs: int) -> Path:
+    """Write a synthetic conda installation with many environments.
+
+    Half of the environments are in the installation's `envs` directory and half in
+    an extra directory from `.condarc`; all are registered in `environments.txt`,
+    along with some that were deleted.
+
+    Args:
+        home (Path): Home directory for the tree.
+        n_envs (int): Number of environments.
+
+    Returns:
+        Path: The conda installation.
+    """
+    root = home / "miniconda3"
+    for d in ("conda-meta", "condabin", "envs"):
+        (root / d).mkdir(parents=True)
+    extra_envs_dir = home / "conda-envs"
+    (home / ".condarc").write_text(f"envs_dirs:\n  - {extra_envs_dir}\n")
+    registered = [str(root)]
+    for i in range(n_envs):
+        prefix = (root / "envs" if i % 2 else extra_envs_dir) / f"env-{i:04d}"
+        (prefix / "conda-meta").mkdir(parents=True)
+        (prefix / "conda-meta" / "history").touch()
+        registered.append(str(prefix))
+    registered += [str(root / "envs" / f"deleted-{i}") for i in range(n_envs // 10)]
+    (home / ".conda").mkdir()
+    (home / ".conda" / "environments.txt").write_text("\n".join(registered) + "\n")
+    return root
+
+
+def benchmark_discovery(n_envs: int = 500, n_runs: int = 20) -> None:
+    """Time environment discovery against a synthetic conda tree.
+
+    `conda env list` is timed too (on the real installation) if conda is on the
+    PATH.
+
+    Args:
+        n_envs (int, optional): Number of environments. Defaults to 500.
+        n_runs (int, optional): Number of runs; the median is reported. Defaults
+        to 20.
+    """
+    import shutil
+    import tempfile
+    from statistics import median
+    from time import perf_counter
+
+    def _time(fxn: Callable[[], list[Path]], n: int) -> tuple[float, int]:
+        durations: list[float] = []
+        for _ in range(n):
+            a = perf_counter()
+            n_found = len(fxn())
+            durations.append(perf_counter() - a)
+        return median(durations), n_found
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        home = Path(tmp_dir)
+        root = write_synthetic_conda_tree(home, n_envs)
+        duration, n_found = _time(
+            lambda: discover_conda_envs(home, [root]) or [], n_runs
+        )
+        print(f"{n_envs} synthetic environments")
+        print(f"  direct discovery: {duration * 1000:9.2f} ms  ({n_found} found)")
+        cache = EnvironmentCache(home / "environments.json")
+        envs = discover_conda_envs(home, [root]) or []
+        cache.save({"conda": [Environment(p.name, p, p.name) for p in envs]}, [])
+        duration, n_found = _time(
+            lambda: [e.prefix for e in (cache.load() or {}).get("conda", [])], n_runs
+        )
+        print(f"  cached listing:   {duration * 1000:9.2f} ms  ({n_found} found)")
+    if shutil.which("conda") is not None:
+        duration, n_found = _time(list_conda_envs_subprocess, 1)
+        print(f"  `conda env list`: {duration * 1000:9.2f} ms  ({n_found} found)")
+    else:
+        print("  `conda env list`: conda is not on the PATH")
+    return None
+
+
+def _write_synthetic_venv(prefix: Path, n_packages: int) -> None:
+    site_packages = prefix / "lib" / "python3.11" / "site-packages"
+    site_packages.mkdir(parents=True)
+    (prefix / "pyvenv.cfg").write_text("home = /usr/bin\nversion = 3.11.7\n")
+    for i in range(n_packages):
+        (site_packages / f"package_{i}-1.0.dist-info").mkdir()
+    return None
+
+
+def write_synthetic_environments(home: Path, n_envs: int) -> None:
+    """Write synthetic environments for every discovery backend.
+
+    Args:
+        home (Path): Home directory for the tree.
+        n_envs (int): Number of environments per backend.
+    """
+    write_synthetic_conda_tree(home, n_envs)
+    poetry_dir = home / ".cache" / "pypoetry" / "virtualenvs"
+    for i in range(n_envs):
+        _write_synthetic_venv(home / ".virtualenvs" / f"venv-{i:04d}", 3)
+        _write_synthetic_venv(poetry_dir / f"proj-{i:04d}-AbCdEfGh-py3.11", 3)
+        _write_synthetic_venv(home / "Developer" / f"proj-{i:04d}" / ".venv", 3)
+        (home / ".pyenv" / "versions" / f"3.{i // 100}.{i % 100}").mkdir(parents=True)
+    return None
+
+
+def benchmark_backends(n_envs: int = 200, n_runs: int = 5) -> None:
+    """Time the discovery backends one after the other and concurrently.
+
+    Args:
+        n_envs (int, optional): Number of environments per backend. Defaults to
+        200.
+        n_runs (int, optional): Number of runs; the median is reported. Defaults
+        to 5.
+    """
+    import tempfile
+    from statistics import median
+
+    # Discover only the synthetic environments.
+    for var in DISCOVERY_ENV_VARS:
+        os.environ.pop(var, None)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        home = Path(tmp_dir)
+        os.environ["PYTHON_ENVS_PROJECT_ROOTS"] = str(home / "Developer")
+        write_synthetic_environments(home, n_envs)
+        print(f"{n_envs} synthetic environments per backend")
+        sequential: list[float] = []
+        for name, backend in DISCOVERY_BACKENDS.items():
+            durations: list[float] = []
+            for _ in range(n_runs):
+                a = perf_counter()
+                n_found = len(backend.discover(home).envs)
+                durations.append(perf_counter() - a)
+            sequential.append(median(durations))
+            print(
+                f"  {name + ':':14} {sequential[-1] * 1000:9.2f} ms  ({n_found} found)"
+            )
+        print(f"  {'sum:':14} {sum(sequential) * 1000:9.2f} ms")
+        durations = []
+        for _ in range(n_runs):
+            a = perf_counter()
+            results = run_backends(home, DISCOVERY_BACKENDS)
+            durations.append(perf_counter() - a)
+        n_found = sum(len(g) for g in merge_environments(results).values())
+        print(
+            f"  {'concurrent:':14} {median(durations) * 1000:9.2f} ms"
+            + f"  ({n_found} found)"
+        )
     return None
 
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
-        copy_env_to_clipboard(env=sys.argv[1])
+    if len(sys.argv) > 1 and sys.argv[1] == "--benchmark":
+        benchmark_discovery()
+        benchmark_backends()
+    elif len(sys.argv) > 1 and sys.argv[1] == "--rescan":
+        environment_cache.clear()
+    elif len(sys.argv) > 1 and sys.argv[1] == "--index":
+        index_environment_stats()
+    elif len(sys.argv) > 1:
+        try:
+            copy_env_to_clipboard(env=sys.argv[1])
+        except ClipboardError as err:
+            sys.exit(f"Could not copy '{sys.argv[1]}': {err}")
     else:
         print_environments()
@@ -13,26 +13,78 @@
 # <swiftbar.refreshOnOpen>true</swiftbar.refreshOnOpen>
 
 import argparse
-from datetime import datetime
+import bisect
+import fcntl
+import heapq
+import json
+import os
+import pickle
+import re
+import socket
+import sqlite3
+import subprocess
+import sys
+from collections import defaultdict
+from contextlib import closing, redirect_stdout
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
 from enum import Enum
+from functools import cache
+from io import StringIO
 from pathlib import Path
-from typing import Final, Optional
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Final, Iterator, Optional
 from uuid import UUID
 
-from pydantic import BaseModel
-from taskw import TaskWarrior
+if TYPE_CHECKING:
+    from pydantic import BaseModel
+    from taskw import TaskWarrior
 
 # --- Setup ---
 
+# Taken once the standard library modules above are imported; interpreter startup
+# and those imports are not included in the recorded click latencies.
+PROCESS_START = perf_counter()
+
 
 def _mod_taskrc_file() -> str:
+    if (taskrc := os.getenv("TASKWARRIOR_TASKRC")) is not None:
+        return taskrc
     return str(Path(__file__).parent / ".mod-taskrc")
 
 
-tw = TaskWarrior(config_filename=_mod_taskrc_file(), marshal=True)
+@cache
+def task_warrior() -> "TaskWarrior":
+    """Shared TaskWarrior client, created on first use."""
+    from taskw import TaskWarrior
+
+    return TaskWarrior(config_filename=_mod_taskrc_file(), marshal=True)
+
 
 FILE = str(Path(__file__))
 
+if (data_path := os.getenv("SWIFTBAR_PLUGIN_DATA_PATH")) is not None:
+    PLUGIN_DATA_DIR = Path(data_path)
+else:
+    PLUGIN_DATA_DIR = Path.home() / ".cache" / "swiftbar-taskwarrior"
+
+# Bump when the format of the cached tasks changes.
+TASK_CACHE_VERSION: Final[int] = 3
+
+# Number of tasks (by urgency) listed per project; the rest go in a submenu.
+TASKS_PER_PROJECT: Final[int] = int(os.getenv("TASKWARRIOR_TASKS_PER_PROJECT", "10"))
+# Maximum number of tasks listed in a project's "more" submenu.
+MORE_TASKS_LIMIT: Final[int] = 50
+
+# Start the background worker when a command has to run in-process.
+START_WORKER: Final[bool] = os.getenv("TASKWARRIOR_WORKER", "0") == "1"
+# Seconds without requests before the worker exits (no limit if not positive).
+WORKER_IDLE_TIMEOUT: Final[float] = float(
+    os.getenv("TASKWARRIOR_WORKER_IDLE_TIMEOUT", "3600")
+)
+# Seconds to wait for the worker to run a command.
+WORKER_TIMEOUT: Final[float] = 30.0
+
 PROJECT_NAMES: Final[dict[str, str]] = {
     "speclet": ":laptopcomputer: speclet",
     "bluishred": ":laptopcomputer: bluishred",
@@ -44,6 +96,225 @@ PROJECT_NAMES: Final[dict[str, str]] = {
 }
 
 
+# --- TaskWarrior data files ---
+
+# Default urgency coefficients of TaskWarrior 2.6 (`task show urgency`).
+URGENCY_COEFFICIENTS: Final[dict[str, float]] = {
+    "next": 15.0,
+    "due": 12.0,
+    "blocking": 8.0,
+    "priority.H": 6.0,
+    "priority.M": 3.9,
+    "priority.L": 1.8,
+    "scheduled": 5.0,
+    "active": 4.0,
+    "age": 2.0,
+    "annotations": 1.0,
+    "tags": 1.0,
+    "project": 1.0,
+    "waiting": -3.0,
+    "blocked": -5.0,
+}
+URGENCY_AGE_MAX: Final[float] = 365.0  # days
+
+_FF4_ATTRIBUTE: Final = re.compile(r'([^\s:\[\]]+):"((?:[^"\\]|\\.)*)"')
+_DATE_ATTRIBUTES: Final[set[str]] = {
+    "entry",
+    "modified",
+    "start",
+    "end",
+    "due",
+    "scheduled",
+    "wait",
+    "until",
+}
+
+
+def read_taskrc(taskrc: Path) -> dict[str, str]:
+    """Read the settings of a taskrc file.
+
+    Args:
+        taskrc (Path): Path to the taskrc file.
+
+    Returns:
+        dict[str, str]: Settings (`include` directives are not followed).
+    """
+    config: dict[str, str] = {}
+    for line in taskrc.read_text().splitlines():
+        line = line.split("#", 1)[0].strip()
+        if "=" not in line:
+            continue
+        key, value = line.split("=", 1)
+        config[key.strip()] = value.strip()
+    return config
+
+
+def data_location(config: dict[str, str]) -> Path:
+    """Directory of the TaskWarrior data files.
+
+    Args:
+        config (dict[str, str]): taskrc settings.
+
+    Returns:
+        Path: Data directory.
+    """
+    location = config.get("data.location", "~/.task")
+    return Path(os.path.expandvars(location)).expanduser()
+
+
+def urgency_coefficients(config: dict[str, str]) -> dict[str, float]:
+    """Urgency coefficients, with any overrides from the taskrc.
+
+    Args:
+        config (dict[str, str]): taskrc settings.
+
+    Returns:
+        dict[str, float]: Urgency coefficients.
+    """
+    coefficients = URGENCY_COEFFICIENTS.copy()
+    for key, value in config.items():
+        if not (key.startswith("urgency.") and key.endswith(".coefficient")):
+            continue
+        name = key.removeprefix("urgency.").removesuffix(".coefficient")
+        name = name.removeprefix("user.tag.").removeprefix("uda.")
+        coefficients[name] = float(value)
+    return coefficients
+
+
+def parse_ff4_line(line: str) -> dict[str, str]:
+    """Parse a task from a line of a TaskWarrior 2.x data file.
+
+    Args:
+        line (str): Line such as `[description:"Do it" status:"pending" ...]`.
+
+    Returns:
+        dict[str, str]: The task's attributes.
+    """
+    task: dict[str, str] = {}
+    for key, value in _FF4_ATTRIBUTE.findall(line):
+        value = value.replace("&open;", "[").replace("&close;", "]")
+        if "\\" in value:
+            value = json.loads(f'"{value}"')
+        task[key] = value
+    return task
+
+
+def _count_factor(n: int) -> float:
+    if n >= 3:
+        return 1.0
+    return {0: 0.0, 1: 0.8, 2: 0.9}[n]
+
+
+def compute_urgency(
+    task: dict[str, Any],
+    now: float,
+    blocking: bool,
+    blocked: bool,
+    coefficients: dict[str, float],
+) -> float:
+    """Urgency of a task, following TaskWarrior's polynomial.
+
+    Args:
+        task (dict[str, Any]): Task attributes, with dates as epoch seconds.
+        now (float): Current time as epoch seconds.
+        blocking (bool): Does another pending task depend on this task?
+        blocked (bool): Does this task depend on another pending task?
+        coefficients (dict[str, float]): Urgency coefficients.
+
+    Returns:
+        float: Urgency.
+    """
+    tags = [t for t in task.get("tags", "").split(",") if t]
+    n_annotations = sum(1 for k in task if k.startswith("annotation_"))
+    terms: dict[str, float] = {
+        "project": float("project" in task),
+        "active": float("start" in task),
+        "scheduled": float("scheduled" in task and task["scheduled"] < now),
+        "waiting": float("wait" in task and task["wait"] > now),
+        "blocked": float(blocked),
+        "blocking": float(blocking),
+        "annotations": _count_factor(n_annotations),
+        "tags": _count_factor(len(tags)),
+    }
+    if "due" in task:
+        days_overdue = (now - task["due"]) / 86400
+        if days_overdue >= 7.0:
+            terms["due"] = 1.0
+        elif days_overdue >= -14.0:
+            terms["due"] = ((days_overdue + 14.0) * 0.8 / 21.0) + 0.2
+        else:
+            terms["due"] = 0.2
+    if "entry" in task:
+        age = (now - task["entry"]) / 86400
+        terms["age"] = 1.0 if age > URGENCY_AGE_MAX else age / URGENCY_AGE_MAX
+    if "priority" in task:
+        terms["priority." + task["priority"]] = 1.0
+    for tag in tags:
+        terms[tag] = 1.0
+    return sum(coefficients.get(k, 0.0) * v for k, v in terms.items() if v)
+
+
+def iter_pending_records(data_dir: Path) -> Iterator[dict[str, Any]]:
+    """Stream the pending tasks from `pending.data`, numbered with their IDs.
+
+    `completed.data` is never read.
+
+    Args:
+        data_dir (Path): TaskWarrior data directory.
+
+    Yields:
+        Iterator[dict[str, Any]]: Pending tasks' attributes, with dates as epoch
+        seconds.
+    """
+    working_set_id = 0
+    with open(data_dir / "pending.data", encoding="utf-8") as pending_file:
+        for line in pending_file:
+            task: dict[str, Any] = parse_ff4_line(line)
+            if task.get("status") not in {"pending", "waiting", "recurring"}:
+                continue
+            working_set_id += 1
+            if task["status"] == "waiting":
+                task["status"] = "pending"
+            elif task["status"] != "pending":
+                continue
+            task["id"] = working_set_id
+            for attr in _DATE_ATTRIBUTES.intersection(task):
+                task[attr] = int(task[attr])
+            yield task
+
+
+def load_pending_tasks(taskrc: Path) -> list[dict[str, Any]]:
+    """Load the pending tasks directly from the TaskWarrior data files.
+
+    This avoids `taskw`, which exports (and marshals) the completed tasks too. The
+    urgency of each task is computed as TaskWarrior would.
+
+    Args:
+        taskrc (Path): taskrc file with the `data.location` setting.
+
+    Returns:
+        list[dict[str, Any]]: Pending tasks' attributes.
+    """
+    config = read_taskrc(taskrc)
+    tasks = list(iter_pending_records(data_location(config)))
+    coefficients = urgency_coefficients(config)
+    pending_uuids = {t["uuid"] for t in tasks}
+    depended_on: set[str] = set()
+    for task in tasks:
+        depended_on.update(task.get("depends", "").split(","))
+    now = datetime.now().timestamp()
+    for task in tasks:
+        depends = set(task.get("depends", "").split(",")) & pending_uuids
+        task["urgency"] = compute_urgency(
+            task,
+            now,
+            blocking=task["uuid"] in depended_on,
+            blocked=len(depends) > 0,
+            coefficients=coefficients,
+        )
+    return tasks
+
+
 # --- Classes ---
 
 
@@ -62,50 +333,449 @@ class TaskPriority(Enum):
     H = "H"
 
 
-class Task(BaseModel):
-    """TaskWarrior task."""
+@cache
+def task_model() -> type["BaseModel"]:
+    """Pydantic model of a TaskWarrior task.
+
+    The model is defined on first use so that pydantic is only imported when a
+    validated task is needed.
+    """
+    from pydantic import BaseModel
+
+    class Task(BaseModel):
+        """TaskWarrior task."""
+
+        description: str
+        project: str = "none"
+        entry: datetime
+        id: int
+        modified: datetime
+        priority: Optional[TaskPriority] = None
+        status: TaskStatus
+        start: Optional[datetime] = None
+        urgency: float
+        uuid: UUID
+
+    return Task
+
+
+def _epoch_to_datetime(epoch: Optional[int]) -> Optional[datetime]:
+    return None if epoch is None else datetime.fromtimestamp(epoch)
+
 
-    description: str
-    project: str = "none"
-    entry: datetime
-    id: int
-    modified: datetime
+class TaskRecord:
+    """Lightweight pending task for rendering the SwiftBar menu.
+
+    The record keeps the attributes as loaded from the data file and only decodes
+    them (dates, UUID, priority) when they are accessed, so no validation is done
+    on the render path. Use `to_task()` to get a validated task.
+    """
+
+    __slots__ = ("_attrs",)
+
+    def __init__(self, attrs: dict[str, Any]) -> None:
+        """Create a task record.
+
+        Args:
+            attrs (dict[str, Any]): Task attributes from `load_pending_tasks()`.
+        """
+        self._attrs = attrs
+        return None
+
+    @property
+    def id(self) -> int:
+        """Working-set ID."""
+        return self._attrs["id"]
+
+    @property
+    def urgency(self) -> float:
+        """Urgency."""
+        return self._attrs["urgency"]
+
+    @property
+    def description(self) -> str:
+        """Description."""
+        return self._attrs["description"]
+
+    @property
+    def project(self) -> str:
+        """Project ("none" if the task has no project)."""
+        return self._attrs.get("project", "none")
+
+    @property
+    def start(self) -> Optional[datetime]:
+        """When the task was started, if it is active."""
+        return _epoch_to_datetime(self._attrs.get("start"))
+
+    @property
+    def priority(self) -> Optional[TaskPriority]:
+        """Priority."""
+        priority = self._attrs.get("priority")
+        return None if priority is None else TaskPriority(priority)
+
+    @property
+    def uuid(self) -> UUID:
+        """UUID."""
+        return UUID(self._attrs["uuid"])
+
+    @property
+    def tags(self) -> list[str]:
+        """Tags."""
+        tags = self._attrs.get("tags")
+        return [] if not tags else tags.split(",")
+
+    @property
+    def due(self) -> Optional[datetime]:
+        """Due date."""
+        return _epoch_to_datetime(self._attrs.get("due"))
+
+    def to_task(self) -> "BaseModel":
+        """Validated TaskWarrior task (see `task_model()`)."""
+        return task_model()(**self._attrs)
+
+
+@dataclass(frozen=True)
+class TaskQuery:
+    """Filter for pending tasks; unset fields match every task."""
+
+    project: Optional[str] = None
     priority: Optional[TaskPriority] = None
-    status: TaskStatus
-    start: Optional[datetime] = None
-    urgency: float
-    uuid: UUID
+    started: Optional[bool] = None
+    tags: tuple[str, ...] = ()
+    due_within: Optional[timedelta] = None  # Includes overdue tasks.
+
+    def matches(self, task: TaskRecord, now: datetime) -> bool:
+        """Whether a task matches the query.
+
+        Args:
+            task (TaskRecord): Task.
+            now (datetime): Current time, for the due window.
+
+        Returns:
+            bool: Whether the task matches.
+        """
+        if self.project is not None and task.project != self.project:
+            return False
+        if self.priority is not None and task.priority is not self.priority:
+            return False
+        if self.started is not None and (task.start is not None) != self.started:
+            return False
+        if self.tags and not set(self.tags).issubset(task.tags):
+            return False
+        if self.due_within is not None:
+            due = task.due
+            return due is not None and due <= now + self.due_within
+        return True
+
+
+class TaskIndex:
+    """Pending tasks indexed by project, priority, started status, tag and due date.
+
+    The index is built in a single pass over the tasks, so every view keeps the
+    order of the tasks it was built from (e.g. sorted by urgency).
+    """
+
+    tasks: list[TaskRecord]
+    by_project: dict[str, list[TaskRecord]]
+    by_priority: dict[Optional[TaskPriority], list[TaskRecord]]
+    by_tag: dict[str, list[TaskRecord]]
+    started: list[TaskRecord]
+    by_due: list[tuple[int, int]]  # (due date epoch, position in `tasks`)
+
+    def __init__(self, tasks: list[TaskRecord]) -> None:
+        """Index a list of tasks.
+
+        Args:
+            tasks (list[TaskRecord]): Tasks in the order the views should have.
+        """
+        by_project: defaultdict[str, list[TaskRecord]] = defaultdict(list)
+        by_priority: defaultdict[Optional[TaskPriority], list[TaskRecord]]
+        by_priority = defaultdict(list)
+        by_tag: defaultdict[str, list[TaskRecord]] = defaultdict(list)
+        self.tasks = tasks
+        self.started = []
+        self.by_due = []
+        for i, task in enumerate(tasks):
+            by_project[task.project].append(task)
+            by_priority[task.priority].append(task)
+            for tag in task.tags:
+                by_tag[tag].append(task)
+            if task.start is not None:
+                self.started.append(task)
+            if (due := task._attrs.get("due")) is not None:
+                self.by_due.append((due, i))
+        self.by_project = dict(by_project)
+        self.by_priority = dict(by_priority)
+        self.by_tag = dict(by_tag)
+        self.by_due.sort()
+        return None
+
+    def _due_before(self, when: datetime) -> list[TaskRecord]:
+        end = bisect.bisect_right(self.by_due, (when.timestamp(), len(self.tasks)))
+        return [self.tasks[i] for i in sorted(i for _, i in self.by_due[:end])]
+
+    def query(
+        self, query: TaskQuery, now: Optional[datetime] = None
+    ) -> list[TaskRecord]:
+        """Find the tasks matching a query.
+
+        The smallest of the indexed candidate lists is filtered with the rest of
+        the query, so a query does not scan all of the tasks unless it is empty.
+
+        Args:
+            query (TaskQuery): Query.
+            now (Optional[datetime], optional): Current time, for the due window.
+            Defaults to now.
+
+        Returns:
+            list[TaskRecord]: Matching tasks, in the order of the index.
+        """
+        now = now or datetime.now()
+        candidates: list[list[TaskRecord]] = [self.tasks]
+        if query.project is not None:
+            candidates.append(self.by_project.get(query.project, []))
+        if query.priority is not None:
+            candidates.append(self.by_priority.get(query.priority, []))
+        if query.started:
+            candidates.append(self.started)
+        for tag in query.tags:
+            candidates.append(self.by_tag.get(tag, []))
+        if query.due_within is not None:
+            candidates.append(self._due_before(now + query.due_within))
+        return [t for t in min(candidates, key=len) if query.matches(t, now)]
+
+    def projects(self) -> list[str]:
+        """Project names, sorted, with the catch-all "none" project last."""
+        projects = sorted(p for p in self.by_project if p != "none")
+        projects.append("none")
+        return projects
+
+    def per_project(self) -> dict[str, list[TaskRecord]]:
+        """Tasks per project, in the order of `projects()`."""
+        return {p: self.by_project.get(p, []) for p in self.projects()}
 
 
 class Tasks:
     """TaskWarrior tasks."""
 
-    tasks: list[Task]
+    tasks: list[TaskRecord]
 
     def __init__(self) -> None:
         """Initialize a TaskWarrior tasks object."""
         self.tasks = self._retrieve_tasks()
         return None
 
-    def _retrieve_tasks(self) -> list[Task]:
-        return [Task(**t) for t in tw.load_tasks()["pending"]]
+    def _retrieve_tasks(self) -> list[TaskRecord]:
+        return [TaskRecord(t) for t in load_pending_tasks(Path(_mod_taskrc_file()))]
 
     def sort_by_urgency(self) -> None:
         """Sort tasks by urgency."""
         self.tasks.sort(key=lambda t: -t.urgency)
         return None
 
-    def per_project(self) -> dict[str, list[Task]]:
+    def index(self) -> TaskIndex:
+        """Index the tasks, keeping their current order."""
+        return TaskIndex(self.tasks)
+
+    def per_project(self) -> dict[str, list[TaskRecord]]:
         """Organize tasks by project."""
-        projects: list[str] = [t.project for t in self.tasks if t.project != "none"]
-        projects = list(set(projects))
-        projects.sort()
-        projects.append("none")
-        proj_tasks: dict[str, list[Task]] = {}
-        for project in projects:
-            proj_task = [t for t in self.tasks if t.project == project]
-            proj_tasks[project] = proj_task
-        return proj_tasks
+        return self.index().per_project()
+
+
+class TaskCache:
+    """Binary cache of the pending tasks, grouped by project.
+
+    The cache is keyed on the modification time and size of the taskrc and
+    `pending.data` files. The date is part of the key too because urgency depends
+    on the age and due date of a task.
+    """
+
+    def __init__(self, cache_file: Path, taskrc: Path) -> None:
+        """Create a task cache.
+
+        Args:
+            cache_file (Path): File storing the cached tasks.
+            taskrc (Path): taskrc file with the `data.location` setting.
+        """
+        self.cache_file = cache_file
+        self.taskrc = taskrc
+        self._memo: Optional[tuple[tuple[Any, ...], dict[str, list[TaskRecord]]]]
+        self._memo = None
+        return None
+
+    def key(self) -> tuple[Any, ...]:
+        """Cache key for the current state of the TaskWarrior data."""
+        data_dir = data_location(read_taskrc(self.taskrc))
+        key: list[Any] = [TASK_CACHE_VERSION, date.today().isoformat()]
+        for path in (self.taskrc, data_dir / "pending.data"):
+            try:
+                stat = path.stat()
+                key += [stat.st_mtime_ns, stat.st_size]
+            except OSError:
+                key += [None, None]
+        return tuple(key)
+
+    def load(self, key: tuple[Any, ...]) -> Optional[dict[str, list[TaskRecord]]]:
+        """Load the cached tasks.
+
+        Args:
+            key (tuple[Any, ...]): Current cache key.
+
+        Returns:
+            Optional[dict[str, list[TaskRecord]]]: Tasks per project if the cache is
+            valid.
+        """
+        if self._memo is not None and self._memo[0] == key:
+            return self._memo[1]
+        try:
+            with open(self.cache_file, "rb") as cache_file:
+                cached_key, per_project = pickle.load(cache_file)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            return None
+        if cached_key != key:
+            return None
+        tasks_per_project = {
+            project: [TaskRecord(t) for t in tasks]
+            for project, tasks in per_project.items()
+        }
+        self._memo = (key, tasks_per_project)
+        return tasks_per_project
+
+    def save(
+        self, key: tuple[Any, ...], per_project: dict[str, list[TaskRecord]]
+    ) -> None:
+        """Save the tasks.
+
+        Args:
+            key (tuple[Any, ...]): Cache key.
+            per_project (dict[str, list[TaskRecord]]): Tasks per project.
+        """
+        self._memo = (key, per_project)
+        data = {p: [t._attrs for t in tasks] for p, tasks in per_project.items()}
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix(".tmp")
+            with open(tmp_file, "wb") as cache_file:
+                pickle.dump((key, data), cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp_file.replace(self.cache_file)
+        except OSError:
+            pass
+        return None
+
+
+task_cache = TaskCache(PLUGIN_DATA_DIR / "tasks.pickle", Path(_mod_taskrc_file()))
+
+
+def top_tasks(tasks: list[TaskRecord], n: int) -> list[TaskRecord]:
+    """Select the most urgent tasks without sorting all of them.
+
+    Args:
+        tasks (list[TaskRecord]): Tasks.
+        n (int): Number of tasks to select.
+
+    Returns:
+        list[TaskRecord]: Up to `n` tasks, sorted by decreasing urgency.
+    """
+    return heapq.nlargest(n, tasks, key=lambda t: t.urgency)
+
+
+def load_tasks_per_project() -> dict[str, list[TaskRecord]]:
+    """Pending tasks per project, from the cache if unchanged.
+
+    The tasks are not sorted; use `top_tasks()` to select the most urgent.
+    """
+    key = task_cache.key()
+    if (per_project := task_cache.load(key)) is not None:
+        return per_project
+    per_project = Tasks().per_project()
+    task_cache.save(key, per_project)
+    uuid_index.update(key, per_project)
+    return per_project
+
+
+class UUIDIndex:
+    """On-disk index of the pending tasks by UUID.
+
+    The index is rebuilt whenever the tasks are reloaded, so a click on a menu item
+    can check that its task is still pending without loading all of the tasks.
+    """
+
+    def __init__(self, db_file: Path) -> None:
+        """Create a UUID index.
+
+        Args:
+            db_file (Path): SQLite database file.
+        """
+        self.db_file = db_file
+        return None
+
+    def _connect(self) -> sqlite3.Connection:
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        con = sqlite3.connect(self.db_file, timeout=1.0)
+        con.execute(
+            "CREATE TABLE IF NOT EXISTS tasks "
+            "(uuid TEXT PRIMARY KEY, id INTEGER NOT NULL, project TEXT NOT NULL)"
+        )
+        con.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT NOT NULL)")
+        return con
+
+    def update(
+        self, key: tuple[Any, ...], per_project: dict[str, list[TaskRecord]]
+    ) -> None:
+        """Replace the indexed tasks.
+
+        Args:
+            key (tuple[Any, ...]): Task cache key of the tasks.
+            per_project (dict[str, list[TaskRecord]]): Pending tasks per project.
+        """
+        rows = (
+            (t._attrs["uuid"], t.id, project)
+            for project, tasks in per_project.items()
+            for t in tasks
+        )
+        try:
+            with closing(self._connect()) as con, con:
+                con.execute("DELETE FROM tasks")
+                con.executemany("INSERT OR REPLACE INTO tasks VALUES (?, ?, ?)", rows)
+                con.execute("DELETE FROM meta")
+                con.execute("INSERT INTO meta VALUES (?)", (json.dumps(key),))
+        except sqlite3.Error:
+            pass
+        return None
+
+    def key(self) -> Optional[tuple[Any, ...]]:
+        """Task cache key of the indexed tasks, if there are any."""
+        try:
+            with closing(self._connect()) as con:
+                row = con.execute("SELECT key FROM meta").fetchone()
+        except sqlite3.Error:
+            return None
+        return None if row is None else tuple(json.loads(row[0]))
+
+    def pending(self, uuids: list[str]) -> list[str]:
+        """Which of the tasks are pending.
+
+        Args:
+            uuids (list[str]): Task UUIDs.
+
+        Returns:
+            list[str]: UUIDs of the tasks that are in the index.
+        """
+        try:
+            with closing(self._connect()) as con:
+                return [
+                    uuid
+                    for uuid in uuids
+                    if con.execute(
+                        "SELECT 1 FROM tasks WHERE uuid = ?", (uuid,)
+                    ).fetchone()
+                    is not None
+                ]
+        except sqlite3.Error:
+            return []
+
+
+uuid_index = UUIDIndex(PLUGIN_DATA_DIR / "uuid-index.sqlite")
 
 
 class CLICommand(Enum):
@@ -114,17 +784,65 @@ class CLICommand(Enum):
     SWIFTBAR = "SWIFTBAR"
     COMPLETED = "COMPLETED"
     ACTIVE = "ACTIVE"
+    BENCHMARK = "BENCHMARK"
+    BATCH = "BATCH"
+    COMPLETE_STARTED = "COMPLETE_STARTED"
+    WORKER = "WORKER"
+    STOP_WORKER = "STOP_WORKER"
 
 
-class CLIArguments(BaseModel):
+@dataclass
+class CLIArguments:
     """CLI result."""
 
     command: CLICommand
-    id: int
+    ids: list[int] = field(default_factory=list)
+    uuids: list[str] = field(default_factory=list)
+    project: Optional[str] = None
+    actions: list[tuple[CLICommand, list[int]]] = field(default_factory=list)
+
+    def to_request(self) -> dict[str, Any]:
+        """JSON-serializable form of the arguments."""
+        return {
+            "command": self.command.value,
+            "ids": self.ids,
+            "uuids": self.uuids,
+            "project": self.project,
+            "actions": [(command.value, ids) for command, ids in self.actions],
+        }
+
+    @classmethod
+    def from_request(cls, request: dict[str, Any]) -> "CLIArguments":
+        """Arguments from their JSON-serializable form.
+
+        Args:
+            request (dict[str, Any]): Output of `to_request()`.
+
+        Returns:
+            CLIArguments: CLI arguments.
+        """
+        return cls(
+            command=CLICommand(request["command"]),
+            ids=[int(i) for i in request.get("ids", [])],
+            uuids=[str(u) for u in request.get("uuids", [])],
+            project=request.get("project"),
+            actions=[
+                (CLICommand(command), [int(i) for i in ids])
+                for command, ids in request.get("actions", [])
+            ],
+        )
 
 
 # --- SwiftBar ---
 
+# Saved views listed as submenus above the projects, keyed by their title.
+SAVED_VIEWS: Final[dict[str, TaskQuery]] = {
+    ":flag.fill: High priority": TaskQuery(priority=TaskPriority.H),
+    ":play.fill: Started": TaskQuery(started=True),
+    ":calendar: Due this week": TaskQuery(due_within=timedelta(days=7)),
+    ":star.fill: Next": TaskQuery(tags=("next",)),
+}
+
 
 def menu_bar_icon() -> None:
     """Print SwiftBar menu icon."""
@@ -134,13 +852,13 @@ def menu_bar_icon() -> None:
     print("---")
 
 
-def _task_command_string(task: Task) -> str:
-    task_desc = "  " + task.description + " | "
+def _task_command_string(task: TaskRecord, indent: str = "  ") -> str:
+    task_desc = indent + task.description + " | "
     msg = task_desc
     if task.start is not None:
         msg += "color=#fc9cc7 "
     cmd1 = f"--command={CLICommand.COMPLETED.value}"
-    cmd2 = f"--id={task.id}"
+    cmd2 = f"--uuid={task.uuid}"
     msg += f"bash={FILE} param0='{cmd1}' param1='{cmd2}' terminal=false "
     msg += "trim=false"
 
@@ -158,48 +876,776 @@ def _modify_project_name(project: str) -> str:
     return PROJECT_NAMES.get(project, project)
 
 
-def list_tasks_by_project() -> None:
-    """Print tasks organized by project for SwiftBar dropdown."""
-    tasks = Tasks()
-    tasks.sort_by_urgency()
-    for project, proj_tasks in tasks.per_project().items():
+def _complete_started_command_string(project: str) -> str:
+    cmd1 = f"--command={CLICommand.COMPLETE_STARTED.value}"
+    cmd2 = f"--project={project}"
+    return (
+        f"--Complete all started tasks | bash={FILE} param0='{cmd1}' param1='{cmd2}' "
+        + "terminal=false"
+    )
+
+
+def _project_menu(
+    project: str, proj_tasks: list[TaskRecord], limit: int, more_limit: int
+) -> Iterator[str]:
+    selected = top_tasks(proj_tasks, limit + more_limit)
+    for task in selected[:limit]:
+        yield _task_command_string(task)
+    if (n_more := len(proj_tasks) - limit) > 0:
+        yield f"  {n_more} more… | sfcolor=gray"
+        for task in selected[limit:]:
+            yield _task_command_string(task, indent="--")
+        if (n_hidden := len(proj_tasks) - len(selected)) > 0:
+            yield f"--{n_hidden} more not shown | color=gray"
+    if (n_started := sum(t.start is not None for t in proj_tasks)) > 0:
+        yield f"  {n_started} started… | sfcolor=gray"
+        yield _complete_started_command_string(project)
+
+
+def list_tasks_by_project(
+    per_project: dict[str, list[TaskRecord]],
+    limit: int = TASKS_PER_PROJECT,
+    more_limit: int = MORE_TASKS_LIMIT,
+) -> None:
+    """Print tasks organized by project for SwiftBar dropdown.
+
+    Only the most urgent tasks of each project are listed; the next ones are in a
+    "more" submenu so the size of the menu is bounded.
+
+    Args:
+        per_project (dict[str, list[TaskRecord]]): Pending tasks per project.
+        limit (int, optional): Number of tasks listed per project. Defaults to
+        `TASKS_PER_PROJECT`.
+        more_limit (int, optional): Number of tasks listed in the "more" submenu.
+        Defaults to `MORE_TASKS_LIMIT`.
+    """
+    for project, proj_tasks in per_project.items():
         proj_name = _modify_project_name(project)
         print(proj_name + " |  sfcolor=gray")
-        for task in proj_tasks:
-            print(_task_command_string(task))
+        for line in _project_menu(project, proj_tasks, limit, more_limit):
+            print(line)
         print("---")
 
     return None
 
 
+def list_saved_views(
+    index: TaskIndex,
+    views: dict[str, TaskQuery] = SAVED_VIEWS,
+    limit: int = MORE_TASKS_LIMIT,
+) -> None:
+    """Print each saved view with matching tasks as a submenu.
+
+    Args:
+        index (TaskIndex): Indexed pending tasks.
+        views (dict[str, TaskQuery], optional): Views keyed by their title.
+        Defaults to `SAVED_VIEWS`.
+        limit (int, optional): Number of tasks listed per view. Defaults to
+        `MORE_TASKS_LIMIT`.
+    """
+    now = datetime.now()
+    printed = False
+    for title, query in views.items():
+        if len(view_tasks := index.query(query, now)) == 0:
+            continue
+        print(f"{title} ({len(view_tasks)}) | sfcolor=gray")
+        for task in top_tasks(view_tasks, limit):
+            print(_task_command_string(task, indent="--"))
+        if (n_hidden := len(view_tasks) - limit) > 0:
+            print(f"--{n_hidden} more not shown | color=gray")
+        printed = True
+    if printed:
+        print("---")
+    return None
+
+
 def swiftbar_app() -> None:
     """Run SwiftBar app."""
+    per_project = load_tasks_per_project()
     menu_bar_icon()
-    list_tasks_by_project()
+    list_saved_views(TaskIndex([t for ts in per_project.values() for t in ts]))
+    list_tasks_by_project(per_project)
+    return None
+
+
+# --- Modify tasks ---
+
+# TaskWarrior command for each command that modifies tasks.
+TASK_MODIFICATIONS: Final[dict[CLICommand, str]] = {
+    CLICommand.COMPLETED: "done",
+    CLICommand.ACTIVE: "start",
+}
+
+
+def _id_filter(ids: list[int]) -> str:
+    # Compress the IDs into ranges, e.g. "1-3,7".
+    ranges: list[list[int]] = []
+    for id in sorted(set(ids)):
+        if ranges and ranges[-1][1] == id - 1:
+            ranges[-1][1] = id
+        else:
+            ranges.append([id, id])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+
+def modify_tasks(task_filter: list[str], modification: str) -> None:
+    """Modify all of the tasks matching a filter with a single `task` invocation.
+
+    Args:
+        task_filter (list[str]): TaskWarrior filter.
+        modification (str): TaskWarrior command (e.g. "done").
+    """
+    cmd = ["task", f"rc:{_mod_taskrc_file()}", "rc.bulk=0", "rc.confirmation=off"]
+    cmd += ["rc.verbose=nothing", *task_filter, modification]
+    subprocess.run(cmd, stdin=subprocess.DEVNULL, capture_output=True, check=True)
+    return None
+
+
+def _task_filter(ids: list[int], uuids: list[str]) -> list[str]:
+    return ([_id_filter(ids)] if ids else []) + uuids
+
+
+def _single_task(ids: list[int], uuids: list[str]) -> dict[str, Any]:
+    return {"id": ids[0]} if ids else {"uuid": uuids[0]}
+
+
+def refresh_menu() -> None:
+    """Ask SwiftBar to re-render the plugin's menu."""
+    name = Path(FILE).name.split(".")[0]
+    try:
+        subprocess.run(
+            ["open", "-g", f"swiftbar://refreshplugin?name={name}"],
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+        )
+    except OSError:
+        pass
+    return None
+
+
+def resolve_menu_tasks(uuids: list[str]) -> list[str]:
+    """Check that the tasks clicked in the menu are still pending.
+
+    The menu is stale if the TaskWarrior data changed since the tasks were indexed
+    or if a clicked task is no longer pending; SwiftBar is then asked to re-render
+    the menu. The index is only rebuilt if the data changed.
+
+    Args:
+        uuids (list[str]): UUIDs of the clicked tasks.
+
+    Returns:
+        list[str]: UUIDs of the tasks that are still pending.
+    """
+    key = task_cache.key()
+    stale = uuid_index.key() != key
+    if stale:
+        per_project = load_tasks_per_project()  # Updates the index if it reloads.
+        if uuid_index.key() != key:  # The tasks came from the task cache.
+            uuid_index.update(key, per_project)
+    pending = uuid_index.pending(uuids)
+    if stale or len(pending) < len(uuids):
+        refresh_menu()
+    return pending
+
+
+def run_batch(actions: list[tuple[CLICommand, list[int]]]) -> None:
+    """Apply a mixed list of actions, with one `task` invocation per kind of action.
+
+    Args:
+        actions (list[tuple[CLICommand, list[int]]]): Commands and their task IDs.
+    """
+    ids_per_command: defaultdict[CLICommand, list[int]] = defaultdict(list)
+    for command, ids in actions:
+        ids_per_command[command] += ids
+    for command, ids in ids_per_command.items():
+        modify_tasks([_id_filter(ids)], TASK_MODIFICATIONS[command])
     return None
 
 
 # --- Complete task ---
 
 
-def complate_task(id: int) -> None:
-    """Mark a task completed."""
-    tw.task_done(id=id)
+def complate_task(ids: list[int], uuids: list[str]) -> None:
+    """Mark tasks completed."""
+    if len(ids) + len(uuids) == 1:
+        task_warrior().task_done(**_single_task(ids, uuids))
+    elif len(ids) + len(uuids) > 1:
+        modify_tasks(_task_filter(ids, uuids), "done")
+    return None
+
+
+def complete_started_tasks(project: str) -> None:
+    """Mark all of the started tasks of a project completed."""
+    project_filter = "project:" if project == "none" else f"project.is:{project}"
+    modify_tasks([project_filter, "+ACTIVE"], "done")
     return None
 
 
 # --- Active task ---
 
 
-def start_task(id: int) -> None:
-    """Mark a task started."""
-    tw.task_start(id=id)
+def start_task(ids: list[int], uuids: list[str]) -> None:
+    """Mark tasks started."""
+    if len(ids) + len(uuids) == 1:
+        task_warrior().task_start(**_single_task(ids, uuids))
+    elif len(ids) + len(uuids) > 1:
+        modify_tasks(_task_filter(ids, uuids), "start")
+    return None
+
+
+# --- Worker ---
+
+
+def run_command(args: CLIArguments) -> None:
+    """Run a command in this process.
+
+    Args:
+        args (CLIArguments): Command and its arguments.
+    """
+    if args.command is CLICommand.SWIFTBAR:
+        swiftbar_app()
+    elif args.command is CLICommand.COMPLETED:
+        complate_task(args.ids, resolve_menu_tasks(args.uuids) if args.uuids else [])
+    elif args.command is CLICommand.ACTIVE:
+        start_task(args.ids, resolve_menu_tasks(args.uuids) if args.uuids else [])
+    elif args.command is CLICommand.BATCH:
+        run_batch(args.actions)
+    elif args.command is CLICommand.COMPLETE_STARTED and args.project is not None:
+        complete_started_tasks(args.project)
+    else:
+        raise NotImplementedError(f"Unexpected command: '{args.command.value}'")
+    return None
+
+
+class TaskWorker:
+    """Optional long-lived process that runs the plugin's commands.
+
+    The worker holds the TaskWarrior client and the loaded tasks and listens on a
+    Unix socket that only the current user can access. When it is running, the
+    plugin sends its command to the worker instead of running it in a new process.
+    """
+
+    def __init__(
+        self, socket_file: Path, idle_timeout: float = WORKER_IDLE_TIMEOUT
+    ) -> None:
+        """Create a task worker.
+
+        Args:
+            socket_file (Path): Unix socket of the worker process.
+            idle_timeout (float, optional): Seconds without requests before the
+            worker exits. Defaults to `WORKER_IDLE_TIMEOUT`.
+        """
+        self.socket_file = socket_file
+        self.lock_file = socket_file.with_suffix(".lock")
+        self.idle_timeout = idle_timeout
+        return None
+
+    def _send(
+        self, request: dict[str, Any], timeout: float = 0.5
+    ) -> Optional[dict[str, Any]]:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            try:
+                sock.connect(str(self.socket_file))
+            except OSError:
+                return None  # The worker is not running.
+            # Once connected, the worker may have run the command, so do not let
+            # the caller fall back to running it again.
+            try:
+                sock.sendall(json.dumps(request).encode())
+                sock.shutdown(socket.SHUT_WR)
+                chunks: list[bytes] = []
+                while chunk := sock.recv(4096):
+                    chunks.append(chunk)
+                return json.loads(b"".join(chunks))
+            except (OSError, ValueError) as err:
+                raise RuntimeError(f"No response from the TaskWarrior worker: {err}")
+
+    def is_running(self) -> bool:
+        """Whether the worker process is running."""
+        try:
+            return self._send({"command": "PING"}) is not None
+        except RuntimeError:
+            return False
+
+    def run(self, args: CLIArguments) -> Optional[str]:
+        """Run a command in the worker.
+
+        Args:
+            args (CLIArguments): Command and its arguments.
+
+        Raises:
+            RuntimeError: If the worker failed to run the command.
+
+        Returns:
+            Optional[str]: Output of the command, or `None` if the worker is not
+            running.
+        """
+        request = args.to_request()
+        if (response := self._send(request, timeout=WORKER_TIMEOUT)) is None:
+            return None
+        if (error := response.get("error")) is not None:
+            raise RuntimeError(f"TaskWarrior worker failed: {error}")
+        return response.get("output", "")
+
+    def start(self) -> None:
+        """Start the worker process in the background."""
+        subprocess.Popen(
+            [sys.executable, FILE, f"--command={CLICommand.WORKER.value}"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        return None
+
+    def stop(self) -> bool:
+        """Stop the worker process.
+
+        Returns:
+            bool: Whether a worker process was running.
+        """
+        try:
+            return self._send({"command": "STOP"}) is not None
+        except RuntimeError:
+            return False
+
+    def _handle(self, request: dict[str, Any]) -> dict[str, Any]:
+        if request.get("command") == "PING":
+            return {}
+        try:
+            output = StringIO()
+            with redirect_stdout(output):
+                run_command(CLIArguments.from_request(request))
+        except Exception as err:
+            return {"error": f"{type(err).__name__}: {err}"}
+        return {"output": output.getvalue()}
+
+    def serve(self) -> None:
+        """Run commands sent to the worker until it is stopped or idle too long.
+
+        This is run in the worker process. The worker holds an exclusive lock on a
+        lock file next to the socket for its whole lifetime, so a second worker
+        started at the same time exits instead of replacing the first one's socket.
+        """
+        self.socket_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_file, "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return None  # Another worker is running or starting.
+            self._serve()
+        return None
+
+    def _serve(self) -> None:
+        # Holding the lock, any socket file left here is from a dead worker.
+        self.socket_file.unlink(missing_ok=True)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            server.bind(str(self.socket_file))
+        finally:
+            os.umask(old_umask)
+        server.listen()
+        server.settimeout(self.idle_timeout if self.idle_timeout > 0 else None)
+        try:
+            while True:
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    break
+                with conn:
+                    conn.settimeout(1.0)
+                    try:
+                        chunks: list[bytes] = []
+                        while chunk := conn.recv(4096):
+                            chunks.append(chunk)
+                        request = json.loads(b"".join(chunks))
+                        if request.get("command") == "STOP":
+                            conn.sendall(b"{}")
+                            break
+                        response = self._handle(request)
+                        conn.sendall(json.dumps(response).encode())
+                    except (OSError, ValueError):
+                        continue
+        finally:
+            server.close()
+            self.socket_file.unlink(missing_ok=True)
+        return None
+
+
+task_worker = TaskWorker(PLUGIN_DATA_DIR / "worker.sock")
+
+
+def record_click(command: CLICommand, via: str, seconds: float) -> None:
+    """Append the latency of a click on a task to the click log.
+
+    Args:
+        command (CLICommand): Command run by the click.
+        via (str): "worker" or "in-process".
+        seconds (float): Seconds from `PROCESS_START` (after interpreter startup
+        and the standard library imports) to the end of the command.
+    """
+    entry = {"command": command.value, "via": via, "seconds": seconds}
+    try:
+        PLUGIN_DATA_DIR.mkdir(parents=True, exist_ok=True)
+        with open(PLUGIN_DATA_DIR / "clicks.jsonl", "a") as log_file:
+            log_file.write(json.dumps(entry) + "\n")
+    except OSError:
+        pass
+    return None
+
+
+# --- Benchmark ---
+
+
+def _format_ff4_line(task: dict[str, str]) -> str:
+    attributes = " ".join(f'{k}:"{v}"' for k, v in task.items())
+    return f"[{attributes}]\n"
+
+
+def _synthetic_task(i: int, status: str, now: int) -> dict[str, str]:
+    task = {
+        "description": f"Synthetic task {i}",
+        "entry": str(now - i * 3600),
+        "modified": str(now - i * 60),
+        "project": f"project-{i % 25}",
+        "status": status,
+        "uuid": str(UUID(int=i)),
+    }
+    if i % 3 == 0:
+        task["priority"] = "HML"[i % 9 // 3]
+    if status == "completed":
+        task["end"] = str(now - i * 30)
+    return task
+
+
+def write_synthetic_data(data_dir: Path, n_pending: int, n_completed: int) -> Path:
+    """Write a synthetic TaskWarrior data directory and a taskrc pointing to it.
+
+    Args:
+        data_dir (Path): Directory for the data files.
+        n_pending (int): Number of pending tasks.
+        n_completed (int): Number of completed tasks.
+
+    Returns:
+        Path: The taskrc file.
+    """
+    now = int(datetime.now().timestamp())
+    with open(data_dir / "pending.data", "w") as pending_file:
+        for i in range(n_pending):
+            pending_file.write(_format_ff4_line(_synthetic_task(i, "pending", now)))
+    with open(data_dir / "completed.data", "w") as completed_file:
+        for i in range(n_pending, n_pending + n_completed):
+            task = _synthetic_task(i, "completed", now)
+            completed_file.write(_format_ff4_line(task))
+    taskrc = data_dir / "taskrc"
+    taskrc.write_text(f"data.location={data_dir}\n")
+    return taskrc
+
+
+def _load_all_records(taskrc: Path) -> list[dict[str, str]]:
+    data_dir = data_location(read_taskrc(taskrc))
+    records: list[dict[str, str]] = []
+    for data_file in ("pending.data", "completed.data"):
+        with open(data_dir / data_file, encoding="utf-8") as f:
+            records += [parse_ff4_line(line) for line in f]
+    return records
+
+
+def benchmark_loading(
+    n_completed: tuple[int, ...] = (10_000, 100_000), n_pending: int = 200
+) -> None:
+    """Compare loading pending tasks directly against loading all the task data.
+
+    Args:
+        n_completed (tuple[int, ...], optional): Numbers of completed tasks.
+        Defaults to (10_000, 100_000).
+        n_pending (int, optional): Number of pending tasks. Defaults to 200.
+    """
+    import shutil
+    import tempfile
+    from statistics import median
+    from time import perf_counter
+
+    from taskw import TaskWarriorShellout
+
+    def _time(fxn: Any, n_loops: int = 5) -> float:
+        timers: list[float] = []
+        for _ in range(n_loops):
+            a = perf_counter()
+            fxn()
+            timers.append(perf_counter() - a)
+        return median(timers) * 1000
+
+    has_task = shutil.which("task") is not None
+    for n in n_completed:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            taskrc = write_synthetic_data(Path(tmp_dir), n_pending, n)
+            print(f"{n_pending} pending, {n} completed tasks")
+            t = _time(lambda: load_pending_tasks(taskrc))
+            print(f"  pending.data only:   {t:9.2f} ms")
+            t = _time(lambda: _load_all_records(taskrc))
+            print(f"  parse all data:      {t:9.2f} ms")
+            if has_task:
+                taskw = TaskWarriorShellout(config_filename=str(taskrc), marshal=True)
+                t = _time(taskw.load_tasks, n_loops=1)
+                print(f"  taskw load_tasks():  {t:9.2f} ms")
+    if not has_task:
+        print("(`task` not found; skipped timing taskw)")
+    return None
+
+
+def _per_project_by_rescanning(tasks: list[TaskRecord]) -> dict[str, list[TaskRecord]]:
+    # The previous implementation of `Tasks.per_project()`, for comparison.
+    projects: list[str] = [t.project for t in tasks if t.project != "none"]
+    projects = list(set(projects))
+    projects.sort()
+    projects.append("none")
+    return {p: [t for t in tasks if t.project == p] for p in projects}
+
+
+def benchmark_grouping(
+    sizes: tuple[tuple[int, int], ...] = ((1_000, 50), (5_000, 200), (20_000, 500))
+) -> None:
+    """Compare single-pass indexing against rescanning the tasks per project.
+
+    Args:
+        sizes (tuple[tuple[int, int], ...], optional): Pairs of the number of tasks
+        and the number of projects.
+    """
+    from statistics import median
+    from time import perf_counter
+
+    now = int(datetime.now().timestamp())
+    for n_tasks, n_projects in sizes:
+        tasks: list[TaskRecord] = []
+        for i in range(n_tasks):
+            fields: dict[str, Any] = _synthetic_task(i, "pending", now)
+            fields |= {"id": i, "urgency": i % 17, "project": f"p-{i % n_projects}"}
+            tasks.append(TaskRecord(fields))
+        tasks.sort(key=lambda t: -t.urgency)
+        print(f"{n_tasks} tasks in {n_projects} projects")
+        for label, group in (
+            ("single-pass index", lambda: TaskIndex(tasks).per_project()),
+            ("rescan per project", lambda: _per_project_by_rescanning(tasks)),
+        ):
+            timers: list[float] = []
+            for _ in range(5):
+                a = perf_counter()
+                group()
+                timers.append(perf_counter() - a)
+            print(f"  {label + ':':20} {median(timers) * 1000:9.2f} ms")
+    return None
+
+
+def benchmark_records(n_tasks: int = 10_000) -> None:
+    """Compare the memory and latency of task records against pydantic tasks.
+
+    Args:
+        n_tasks (int, optional): Number of pending tasks. Defaults to 10_000.
+    """
+    import tempfile
+    import tracemalloc
+    from time import perf_counter
+
+    model = task_model()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        taskrc = write_synthetic_data(Path(tmp_dir), n_tasks, 0)
+        print(f"{n_tasks} pending tasks")
+        for label, build in (
+            ("TaskRecord", TaskRecord),
+            ("pydantic Task", lambda t: model(**t)),
+        ):
+            records = load_pending_tasks(taskrc)
+            tracemalloc.start()
+            a = perf_counter()
+            tasks = [build(t) for t in records]
+            for task in tasks:
+                _task_command_string(task)  # type: ignore[arg-type]
+            duration = perf_counter() - a
+            memory, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            del tasks
+            print(
+                f"  {label + ':':15} {duration * 1000:9.2f} ms"
+                + f"  {memory / 1024 ** 2:7.2f} MiB"
+            )
+    return None
+
+
+def benchmark_rendering(n_tasks: int = 20_000, n_projects: int = 20) -> None:
+    """Compare the full menu against the menu limited to the top tasks per project.
+
+    Args:
+        n_tasks (int, optional): Number of tasks. Defaults to 20_000.
+        n_projects (int, optional): Number of projects. Defaults to 20.
+    """
+    from statistics import median
+    from time import perf_counter
+
+    def _full_menu(proj_tasks: list[TaskRecord]) -> Iterator[str]:
+        for task in sorted(proj_tasks, key=lambda t: -t.urgency):
+            yield _task_command_string(task)
+
+    now = int(datetime.now().timestamp())
+    per_project: defaultdict[str, list[TaskRecord]] = defaultdict(list)
+    for i in range(n_tasks):
+        fields: dict[str, Any] = _synthetic_task(i, "pending", now)
+        fields |= {"id": i, "urgency": (i * 7919) % 1000 / 100}
+        per_project[f"p-{i % n_projects}"].append(TaskRecord(fields))
+
+    print(f"{n_tasks} tasks in {n_projects} projects")
+    for label, render in (
+        ("sort, list all", _full_menu),
+        (
+            f"top {TASKS_PER_PROJECT} + {MORE_TASKS_LIMIT}",
+            lambda t: _project_menu("p", t, TASKS_PER_PROJECT, MORE_TASKS_LIMIT),
+        ),
+    ):
+        timers: list[float] = []
+        for _ in range(5):
+            a = perf_counter()
+            menu = "\n".join("\n".join(render(tasks)) for tasks in per_project.values())
+            timers.append(perf_counter() - a)
+        n_lines = menu.count("\n") + 1
+        print(f"  {label + ':':16} {median(timers) * 1000:9.2f} ms  {n_lines} lines")
+    return None
+
+
+def benchmark_clicks(n_latest: int = 1_000) -> None:
+    """Summarize the latency of the latest clicks on tasks from the click log.
+
+    Latencies are measured from `PROCESS_START`, so they do not include interpreter
+    startup; see `benchmark_startup()` for the full process time.
+
+    Args:
+        n_latest (int, optional): Number of latest clicks. Defaults to 1_000.
+    """
+    from statistics import median, quantiles
+
+    try:
+        lines = (PLUGIN_DATA_DIR / "clicks.jsonl").read_text().splitlines()
+    except OSError:
+        lines = []
+    latencies: defaultdict[tuple[str, str], list[float]] = defaultdict(list)
+    for line in lines[-n_latest:]:
+        entry = json.loads(line)
+        latencies[(entry["command"], entry["via"])].append(entry["seconds"])
+    print(f"clicks on tasks (latest {n_latest})")
+    if len(latencies) == 0:
+        print("  no clicks recorded")
+    for (command, via), seconds in sorted(latencies.items()):
+        p95 = quantiles(seconds, n=20)[-1] if len(seconds) > 1 else seconds[0]
+        print(
+            f"  {command + ' ' + via + ':':22} {len(seconds):5d} clicks"
+            + f"  median {median(seconds) * 1000:8.2f} ms  p95 {p95 * 1000:8.2f} ms"
+        )
+    return None
+
+
+STARTUP_COMMANDS: Final[dict[str, list[str]]] = {
+    "--help": ["--help"],
+    CLICommand.SWIFTBAR.value: [],
+    CLICommand.COMPLETED.value: [f"--command={CLICommand.COMPLETED.value}", "--id=1"],
+    CLICommand.ACTIVE.value: [f"--command={CLICommand.ACTIVE.value}", "--id=2"],
+    CLICommand.BATCH.value: [
+        f"--command={CLICommand.BATCH.value}",
+        f"--action={CLICommand.COMPLETED.value}:3,4",
+        f"--action={CLICommand.ACTIVE.value}:5",
+    ],
+    CLICommand.COMPLETE_STARTED.value: [
+        f"--command={CLICommand.COMPLETE_STARTED.value}",
+        "--project=project-0",
+    ],
+    CLICommand.STOP_WORKER.value: [f"--command={CLICommand.STOP_WORKER.value}"],
+}
+
+
+def _parse_importtime(stderr: str) -> dict[str, float]:
+    import_times: dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if name.startswith("  "):
+            continue  # Imported by another module.
+        import_times[name.strip()] = int(cumulative) / 1000
+    return import_times
+
+
+def benchmark_startup(n_runs: int = 5, top: int = 3) -> None:
+    """Report the import time and latency of each command in a fresh interpreter.
+
+    Each run uses a new synthetic TaskWarrior database and an empty plugin data
+    directory, so the SWIFTBAR command measures the first (uncached) render.
+
+    Args:
+        n_runs (int, optional): Runs per command; the median is reported. Defaults
+        to 5.
+        top (int, optional): Number of most expensive modules to list. Defaults to 3.
+    """
+    import shutil
+    import tempfile
+    from statistics import median
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = Path(tmp_dir) / "data"
+        cache_dir = Path(tmp_dir) / "cache"
+        data_dir.mkdir()
+        env = os.environ | {
+            "TASKWARRIOR_TASKRC": str(data_dir / "taskrc"),
+            "SWIFTBAR_PLUGIN_DATA_PATH": str(cache_dir),
+        }
+        env.pop("TASKWARRIOR_WORKER", None)
+        print("startup (fresh interpreter)")
+        for label, args in STARTUP_COMMANDS.items():
+            runs: list[dict[str, float]] = []
+            durations: list[float] = []
+            n_failed = 0
+            for _ in range(n_runs):
+                write_synthetic_data(data_dir, 1_000, 1_000)
+                shutil.rmtree(cache_dir, ignore_errors=True)
+                a = perf_counter()
+                proc = subprocess.run(
+                    [sys.executable, "-X", "importtime", FILE, *args],
+                    env=env,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                )
+                durations.append(perf_counter() - a)
+                runs.append(_parse_importtime(proc.stderr))
+                n_failed += proc.returncode != 0
+            modules = {m for run in runs for m in run}
+            costs = {m: median(run.get(m, 0.0) for run in runs) for m in modules}
+            total = median(sum(run.values()) for run in runs)
+            msg = f"  {label + ':':18} imports {total:7.1f} ms"
+            msg += f"  total {median(durations) * 1000:7.1f} ms"
+            if n_failed > 0:
+                msg += f"  ({n_failed} of {n_runs} runs failed)"
+            print(msg)
+            for module in sorted(costs, key=lambda m: -costs[m])[:top]:
+                print(f"    {costs[module]:7.1f} ms  {module}")
     return None
 
 
 # --- Main ---
 
 
+def _parse_action(action: str) -> tuple[CLICommand, list[int]]:
+    command, _, ids = action.partition(":")
+    try:
+        cli_command = CLICommand(command)
+        task_ids = [int(i) for i in ids.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid action: '{action}'")
+    if cli_command not in TASK_MODIFICATIONS:
+        raise argparse.ArgumentTypeError(f"Unexpected action: '{action}'")
+    return cli_command, task_ids
+
+
 def parse_arguments() -> CLIArguments:
     """Parse command line arguments."""
     parser = argparse.ArgumentParser()
@@ -210,23 +1656,60 @@ def parse_arguments() -> CLIArguments:
         type=CLICommand,
         default=CLICommand.SWIFTBAR,
     )
-    parser.add_argument("-i", "--id", help="task ID", type=int, default=-1)
+    parser.add_argument(
+        "-i", "--id", help="task ID (repeatable)", type=int, action="append"
+    )
+    parser.add_argument(
+        "-u", "--uuid", help="task UUID (repeatable)", type=str, action="append"
+    )
+    parser.add_argument("-p", "--project", help="project (COMPLETE_STARTED)")
+    parser.add_argument(
+        "-a",
+        "--action",
+        help="batch action as 'COMMAND:ID,ID,...' (repeatable)",
+        type=_parse_action,
+        action="append",
+    )
     args = parser.parse_args()
-    return CLIArguments(command=args.command, id=args.id)
+    if args.command is CLICommand.COMPLETE_STARTED and args.project is None:
+        parser.error(f"--command={args.command.value} requires --project")
+    if args.command in TASK_MODIFICATIONS and not (args.id or args.uuid):
+        parser.error(f"--command={args.command.value} requires --id or --uuid")
+    return CLIArguments(
+        command=args.command,
+        ids=args.id or [],
+        uuids=args.uuid or [],
+        project=args.project,
+        actions=args.action or [],
+    )
 
 
 def main() -> None:
     """Main."""
     args = parse_arguments()
-    if args.command is CLICommand.SWIFTBAR:
-        swiftbar_app()
-        return None
-    elif args.command is CLICommand.COMPLETED:
-        complate_task(args.id)
-    elif args.command is CLICommand.ACTIVE:
-        start_task(args.id)
+    if args.command is CLICommand.BENCHMARK:
+        benchmark_loading()
+        benchmark_grouping()
+        benchmark_records()
+        benchmark_rendering()
+        benchmark_clicks()
+        benchmark_startup()
+    elif args.command is CLICommand.WORKER:
+        task_worker.serve()
+    elif args.command is CLICommand.STOP_WORKER:
+        task_worker.stop()
     else:
-        raise NotImplementedError(f"Unexpected command: '{args.command.value}'")
+        via = "worker"
+        if (output := task_worker.run(args)) is not None:
+            sys.stdout.write(output)
+        else:
+            via = "in-process"
+            run_command(args)
+            if START_WORKER:
+                task_worker.start()
+        if args.command is not CLICommand.SWIFTBAR:
+            record_click(args.command, via, perf_counter() - PROCESS_START)
+    return None
 
 
 if __name__ == "__main__":